@@ -1,14 +1,19 @@
 """
 API Routes for Resume Parser
 """
-from fastapi import APIRouter, File, UploadFile, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
-from typing import List
+from fastapi import APIRouter, File, UploadFile, HTTPException, BackgroundTasks, Depends, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Optional
 from pathlib import Path
+from functools import lru_cache
+from collections import Counter, OrderedDict
+import hashlib
 import os
-import uuid
-import json
+import sys
 from datetime import datetime
+import logging
+import orjson
+import asyncio
 
 from app.config import settings
 from app.services.pdf_extractor import PDFExtractor
@@ -17,34 +22,318 @@ from app.services.parser import ResumeParser
 from app.services.resume_analyzer import ResumeAnalyzer
 from app.utils.validators import validate_parsed_data
 
+# The screening system lives at <project root>/screening and uses top-level
+# imports, so put it on sys.path once at import time
+SCREENING_DIR = Path(__file__).resolve().parents[3] / "screening"
+if str(SCREENING_DIR) not in sys.path:
+    sys.path.insert(0, str(SCREENING_DIR))
+
+from main import screen_candidates as _screen_candidates
+from services.ollama_client import OllamaClient as ScreeningClient
+
+
+logger = logging.getLogger(__name__)
+
+PDF_MAGIC = b"%PDF"
+
+# (JD hash, folder fingerprint) -> (ranked_results, screening_time)
+SCREENING_CACHE_SIZE = 16
+_screening_cache: OrderedDict = OrderedDict()
 
 router = APIRouter()
 
-pdf_extractor = PDFExtractor()
-ollama_service = OllamaService()
-resume_parser = ResumeParser(pdf_extractor, ollama_service)
-resume_analyzer = ResumeAnalyzer(ollama_service)
+
+# Services are built in the app lifespan (see main.py) and live on app.state
+def get_pdf_extractor(request: Request) -> PDFExtractor:
+    """Dependency: shared PDFExtractor"""
+    return request.app.state.pdf_extractor
+
+
+def get_ollama_service(request: Request) -> OllamaService:
+    """Dependency: shared OllamaService"""
+    return request.app.state.ollama_service
+
+
+def get_resume_parser(request: Request) -> ResumeParser:
+    """Dependency: shared ResumeParser"""
+    return request.app.state.resume_parser
+
+
+def get_resume_analyzer(request: Request) -> ResumeAnalyzer:
+    """Dependency: shared ResumeAnalyzer"""
+    return request.app.state.resume_analyzer
+
+
+def get_screening_client(request: Request) -> ScreeningClient:
+    """Dependency: shared screening OllamaClient"""
+    return request.app.state.screening_client
+
+
+def write_resume_json(output_path: str, parsed_data: dict):
+    """
+    Write a parsed resume as indented UTF-8 JSON
+    
+    The JSON goes to a temp file in the same folder and is then renamed over
+    output_path, so a crash never leaves a half-written candidate behind.
+    """
+    tmp_path = output_path + ".tmp"
+    
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(parsed_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        if settings.DURABILITY == "strict":
+            f.flush()
+            os.fsync(f.fileno())
+    
+    os.replace(tmp_path, output_path)
+
+
+async def read_upload(file: UploadFile) -> bytes:
+    """
+    Read an upload into memory chunk by chunk; PDFs are never written to disk.
+    
+    Raises ValueError as soon as the upload turns out not to start with the
+    PDF magic bytes, or grows past MAX_FILE_SIZE.
+    """
+    header = await file.read(len(PDF_MAGIC))
+    if header != PDF_MAGIC:
+        raise ValueError("File is not a valid PDF")
+    
+    chunks = [header]
+    size = len(header)
+    
+    while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > settings.MAX_FILE_SIZE:
+            raise ValueError(f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE} bytes")
+        chunks.append(chunk)
+    
+    return b"".join(chunks)
+
+
+async def _stage_upload(file: UploadFile) -> dict:
+    """
+    Read one upload into memory.
+    
+    Returns an entry with the "pdf" bytes, or an "error".
+    """
+    upload = {"filename": file.filename}
+    
+    try:
+        upload["pdf"] = await read_upload(file)
+    except Exception as e:
+        upload["error"] = str(e)
+    
+    return upload
+
+
+async def _extract_upload(upload: dict, resume_parser: ResumeParser) -> dict:
+    """
+    Extract the text of a staged upload into "text", dropping its PDF bytes.
+    """
+    pdf_bytes = upload.pop("pdf", None)
+    
+    if pdf_bytes is None:
+        return upload
+    
+    try:
+        upload["text"] = await resume_parser.extract(pdf_bytes)
+    except Exception as e:
+        upload["error"] = str(e)
+    
+    return upload
+
+
+async def _extract_uploads(files: List[UploadFile], resume_parser: ResumeParser) -> List[dict]:
+    """
+    Read each upload into memory and extract its text.
+    
+    Files are processed concurrently, bounded by MAX_CONCURRENT_PARSES.
+    Returns one entry per file, in upload order, with either a "text" or an
+    "error" key.
+    """
+    sem = asyncio.Semaphore(max(1, settings.MAX_CONCURRENT_PARSES))
+    
+    async def _extract_one(file: UploadFile) -> dict:
+        async with sem:
+            return await _extract_upload(await _stage_upload(file), resume_parser)
+    
+    return list(await asyncio.gather(*[_extract_one(file) for file in files]))
+
+
+async def _parse_uploads(uploads: List[dict], resume_parser: ResumeParser):
+    """
+    Parse every extracted upload text in one batched LLM pass.
+    
+    Stores the result under "parsed", or the failure under "error".
+    """
+    pending = [u for u in uploads if "error" not in u]
+    
+    if not pending:
+        return
+    
+    logger.info("Parsing %d resume(s) with Ollama...", len(pending))
+    parsed_batch = await resume_parser.parse_many([u["text"] for u in pending])
+    
+    for upload, parsed in zip(pending, parsed_batch):
+        if isinstance(parsed, Exception):
+            upload["error"] = str(parsed)
+        else:
+            upload["parsed"] = parsed
 
 
-def cleanup_file(file_path: str):
+def _save_candidate(upload: dict, output_folder: str, candidate_number: int) -> dict:
     """
-    Background task to delete uploaded file
+    Write a parsed upload as candidate_<n>.json and build its result entry
     """
+    if "error" in upload:
+        logger.error("✗ Failed to parse %s: %s", upload['filename'], upload['error'])
+        return {
+            "filename": upload["filename"],
+            "status": "failed",
+            "error": upload["error"]
+        }
+    
     try:
-        if os.path.exists(file_path):
-            os.remove(file_path)
+        parsed_data = upload["parsed"]
+        
+        if 'analysis' in parsed_data:
+            del parsed_data['analysis']
+        
+        parsed_data['_id'] = f"candidate_{candidate_number}"
+        
+        output_path = os.path.join(output_folder, f"candidate_{candidate_number}.json")
+        write_resume_json(output_path, parsed_data)
+        
+        logger.info("✓ Saved as candidate_%d.json", candidate_number)
+        
+        return {
+            "filename": upload["filename"],
+            "status": "success",
+            "saved_as": f"candidate_{candidate_number}.json",
+            "output_path": output_path
+        }
+    
     except Exception as e:
-        print(f"Error deleting file {file_path}: {str(e)}")
+        logger.error("✗ Failed to save %s: %s", upload['filename'], e)
+        return {
+            "filename": upload["filename"],
+            "status": "failed",
+            "error": str(e)
+        }
+
+
+def _batch_summary(
+    total_files: int,
+    results: List[dict],
+    starting_counter: int,
+    current_counter: int,
+    output_folder: str
+) -> dict:
+    """
+    Build the /batch-parse summary for a finished batch
+    """
+    counts = Counter(r['status'] for r in results)
+    successful = counts['success']
+    failed = total_files - successful
+    total_in_db = get_total_candidates(output_folder)
+    
+    return {
+        "success": True,
+        "total_files": total_files,
+        "parsed_successfully": successful,
+        "failed": failed,
+        "new_candidates": successful,
+        "total_in_database": total_in_db,
+        "counter_range": f"{starting_counter + 1}-{current_counter}" if successful > 0 else "none",
+        "output_folder": output_folder,
+        "results": results,
+        "parsed_at": datetime.now().isoformat()
+    }
+
+
+async def _stream_batch_parse(
+    staged: List[dict],
+    resume_parser: ResumeParser,
+    output_folder: str,
+    starting_counter: int
+):
+    """
+    Parse staged uploads and yield one NDJSON line per resume as it finishes,
+    followed by a final summary line
+    """
+    sem = asyncio.Semaphore(max(1, settings.MAX_CONCURRENT_PARSES))
+    
+    async def _process_one(upload: dict) -> dict:
+        async with sem:
+            upload = await _extract_upload(upload, resume_parser)
+            if "error" not in upload:
+                try:
+                    upload["parsed"] = await resume_parser.parse_text(upload["text"])
+                except Exception as e:
+                    upload["error"] = str(e)
+            return upload
+    
+    results = []
+    current_counter = starting_counter
+    
+    for next_done in asyncio.as_completed([_process_one(u) for u in staged]):
+        upload = await next_done
+        
+        # Numbers are handed out on the event loop as results arrive, so
+        # concurrent parses can never claim the same candidate number
+        if "error" not in upload:
+            current_counter += 1
+        
+        result = _save_candidate(upload, output_folder, current_counter)
+        results.append(result)
+        update_candidate_counter(output_folder, current_counter)
+        
+        yield orjson.dumps(result) + b"\n"
+    
+    logger.info("Updated counter to: %d", current_counter)
+    
+    summary = _batch_summary(len(staged), results, starting_counter, current_counter, output_folder)
+    yield orjson.dumps(summary) + b"\n"
+
+
+def _persist_resumes(resumes: List[dict], output_folder: str):
+    """
+    Background task to write parsed resumes as <_id>.json
+    """
+    for parsed_data in resumes:
+        try:
+            write_resume_json(os.path.join(output_folder, f"{parsed_data['_id']}.json"), parsed_data)
+            logger.info("✓ Saved as %s.json", parsed_data['_id'])
+        except Exception as e:
+            logger.error("✗ Failed to save %s: %s", parsed_data['_id'], e)
+
+
+def _folder_fingerprint(output_folder: str) -> tuple:
+    """
+    Cheap change marker for the parsed resumes: (newest mtime, JSON file count)
+    """
+    newest = 0
+    count = 0
+    with os.scandir(output_folder) as entries:
+        for entry in entries:
+            if entry.name.endswith('.json') and entry.is_file(follow_symlinks=False):
+                newest = max(newest, entry.stat().st_mtime_ns)
+                count += 1
+    return newest, count
 
 
 @router.post("/screen-candidates")
 async def screen_candidates_endpoint(
-    job_description: str = ""
+    job_description: str = "",
+    top_k: Optional[int] = None,
+    screening_client: ScreeningClient = Depends(get_screening_client)
 ):
     """
     Run screening on all parsed resumes in data/parsed_resumes/
+    
+    Pass top_k to return only the k best-ranked candidates.
     """
-    print(f"Received JD length: {len(job_description)}")
+    logger.info("Received JD length: %d", len(job_description))
     
     if not job_description or not job_description.strip():
         raise HTTPException(
@@ -60,7 +349,8 @@ async def screen_candidates_endpoint(
             detail="No parsed resumes found. Please parse resumes first."
         )
     
-    total_candidates = get_total_candidates(output_folder)
+    fingerprint = _folder_fingerprint(output_folder)
+    total_candidates = fingerprint[1]
     
     if total_candidates == 0:
         raise HTTPException(
@@ -68,25 +358,29 @@ async def screen_candidates_endpoint(
             detail="No parsed resumes found. Please parse resumes first."
         )
     
-    print(f"\n{'='*60}")
-    print(f"SCREENING {total_candidates} CANDIDATES")
-    print(f"{'='*60}\n")
+    # Same JD against an unchanged folder gives the same ranking
+    cache_key = (hashlib.blake2b(job_description.encode(), digest_size=16).digest(), fingerprint, top_k)
     
     try:
-        import sys
-        from pathlib import Path
-        
-        screening_path = Path(__file__).parent.parent.parent.parent / "screening"
-        sys.path.insert(0, str(screening_path))
-        
-        from main import screen_candidates
-        
-        ranked_results, screening_time = await screen_candidates(
-            jd_text=job_description,
-            resume_dir=Path(output_folder)
-        )
-        
-        print(f"\n✓ Screening completed in {screening_time:.1f} seconds")
+        if cache_key in _screening_cache:
+            _screening_cache.move_to_end(cache_key)
+            ranked_results, screening_time = _screening_cache[cache_key]
+            logger.info("✓ Returning cached screening of %d candidates", total_candidates)
+        else:
+            logger.info("SCREENING %d CANDIDATES", total_candidates)
+            
+            ranked_results, screening_time = await _screen_candidates(
+                jd_text=job_description,
+                resume_dir=Path(output_folder),
+                ollama_client=screening_client,
+                top_k=top_k
+            )
+            
+            _screening_cache[cache_key] = (ranked_results, screening_time)
+            if len(_screening_cache) > SCREENING_CACHE_SIZE:
+                _screening_cache.popitem(last=False)
+            
+            logger.info("✓ Screening completed in %.1f seconds", screening_time)
         
         return {
             "success": True,
@@ -97,10 +391,7 @@ async def screen_candidates_endpoint(
         }
     
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"\n✗ Screening failed: {str(e)}")
-        print(error_details)
+        logger.exception("✗ Screening failed: %s", e)
         
         raise HTTPException(
             status_code=500,
@@ -122,16 +413,17 @@ async def clear_database():
             "deleted_count": 0
         }
     
-    json_files = [f for f in os.listdir(output_folder) if f.endswith('.json')]
-    deleted_count = len(json_files)
+    deleted_count = 0
     
-    for filename in json_files:
-        file_path = os.path.join(output_folder, filename)
-        os.remove(file_path)
+    with os.scandir(output_folder) as entries:
+        for entry in entries:
+            if entry.name.endswith('.json') and entry.is_file(follow_symlinks=False):
+                os.remove(entry.path)
+                deleted_count += 1
     
     update_candidate_counter(output_folder, 0)
     
-    print(f"✓ Cleared {deleted_count} candidates from database")
+    logger.info("✓ Cleared %d candidates from database", deleted_count)
     
     return {
         "success": True,
@@ -147,6 +439,9 @@ async def get_database_stats():
     """
     output_folder = get_output_folder()
     
+    # The counter is only a high-water mark for naming new files: it never goes
+    # down, is bumped before _save_candidate can fail, and /parse-and-screen
+    # writes candidate_<n> files without touching it. Count the files themselves.
     total_candidates = get_total_candidates(output_folder)
     current_counter = get_candidate_counter(output_folder)
     
@@ -162,7 +457,9 @@ async def get_database_stats():
 async def parse_and_screen(
     background_tasks: BackgroundTasks,
     files: List[UploadFile] = File(...),
-    job_description: str = ""
+    job_description: str = "",
+    resume_parser: ResumeParser = Depends(get_resume_parser),
+    screening_client: ScreeningClient = Depends(get_screening_client)
 ):
     """
     Parse multiple resumes and run screening against job description
@@ -186,68 +483,47 @@ async def parse_and_screen(
     os.makedirs(output_folder, exist_ok=True)
     
     # Step 1: Parse all resumes
-    print(f"\n{'='*60}")
-    print(f"STEP 1: PARSING {len(files)} RESUMES")
-    print(f"{'='*60}\n")
+    logger.info("STEP 1: PARSING %d RESUMES", len(files))
     
-    for idx, file in enumerate(files, start=1):
-        try:
-            # Read file content
-            file_content = await file.read()
-            
-            if len(file_content) > settings.MAX_FILE_SIZE:
-                parse_results.append({
-                    "filename": file.filename,
-                    "status": "failed",
-                    "error": f"File size exceeds {settings.MAX_FILE_SIZE} bytes"
-                })
-                continue
-            
-            # Save temporarily
-            file_id = str(uuid.uuid4())
-            temp_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.pdf")
-            
-            with open(temp_path, "wb") as f:
-                f.write(file_content)
-            
-            # Parse resume (NO analysis)
-            print(f"Parsing resume {idx}/{len(files)}: {file.filename}")
-            parsed_data = await resume_parser.parse(temp_path)
-            
-            # Remove analysis if present
-            if 'analysis' in parsed_data:
-                del parsed_data['analysis']
-            
-            # Save to output folder
-            output_path = os.path.join(output_folder, f"candidate_{idx}.json")
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(parsed_data, f, indent=2, ensure_ascii=False)
-            
-            # Clean up temp file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            
-            parse_results.append({
-                "filename": file.filename,
-                "status": "success",
-                "saved_as": f"candidate_{idx}.json"
-            })
-            
-            print(f"✓ Saved as candidate_{idx}.json")
-        
-        except Exception as e:
-            print(f"✗ Failed to parse {file.filename}: {str(e)}")
+    # Read uploads into memory and extract their text
+    uploads = await _extract_uploads(files, resume_parser)
+    
+    # Parse all extracted texts in one batched LLM pass (NO analysis)
+    await _parse_uploads(uploads, resume_parser)
+    
+    # Screening works on the parsed dicts directly; they're written to disk
+    # in the background after the response instead of being re-read
+    parsed_resumes = []
+    
+    for idx, upload in enumerate(uploads, start=1):
+        if "error" in upload:
+            logger.error("✗ Failed to parse %s: %s", upload['filename'], upload['error'])
             parse_results.append({
-                "filename": file.filename,
+                "filename": upload["filename"],
                 "status": "failed",
-                "error": str(e)
+                "error": upload["error"]
             })
-            
-            if 'temp_path' in locals() and os.path.exists(temp_path):
-                os.remove(temp_path)
+            continue
+        
+        parsed_data = upload["parsed"]
+        
+        # Remove analysis if present
+        if 'analysis' in parsed_data:
+            del parsed_data['analysis']
+        
+        parsed_data['_id'] = f"candidate_{idx}"
+        parsed_resumes.append(parsed_data)
+        
+        parse_results.append({
+            "filename": upload["filename"],
+            "status": "success",
+            "saved_as": f"candidate_{idx}.json"
+        })
     
     # Check if any resumes were parsed successfully
-    successful_parses = sum(1 for r in parse_results if r['status'] == 'success')
+    counts = Counter(r['status'] for r in parse_results)
+    successful_parses = counts['success']
+    failed_parses = counts['failed']
     
     if successful_parses == 0:
         raise HTTPException(
@@ -256,36 +532,27 @@ async def parse_and_screen(
         )
     
     # Step 2: Run screening
-    print(f"\n{'='*60}")
-    print(f"STEP 2: SCREENING {successful_parses} CANDIDATES")
-    print(f"{'='*60}\n")
+    logger.info("STEP 2: SCREENING %d CANDIDATES (%d failed to parse)", successful_parses, failed_parses)
+    
+    # The resumes are saved (as "saved_as" reports) whether or not screening succeeds
+    background_tasks.add_task(_persist_resumes, parsed_resumes, output_folder)
     
     try:
-        # Import screening system
-        import sys
-        from pathlib import Path
-        
-        # Add screening directory to path
-        screening_path = Path(__file__).parent.parent.parent / "screening"
-        sys.path.insert(0, str(screening_path))
-        
-        # Import and run screening
-        from main import screen_candidates
-        
         # Run screening
-        ranked_results, screening_time = await screen_candidates(
+        ranked_results, screening_time = await _screen_candidates(
             jd_text=job_description,
-            resume_dir=Path(output_folder)
+            resumes=parsed_resumes,
+            ollama_client=screening_client
         )
         
-        print(f"\n✓ Screening completed in {screening_time:.1f} seconds")
+        logger.info("✓ Screening completed in %.1f seconds", screening_time)
         
         return {
             "success": True,
             "parsing": {
                 "total_files": len(files),
                 "parsed_successfully": successful_parses,
-                "failed": len(files) - successful_parses,
+                "failed": failed_parses,
                 "results": parse_results
             },
             "screening": {
@@ -297,10 +564,10 @@ async def parse_and_screen(
         }
     
     except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"\n✗ Screening failed: {str(e)}")
-        print(error_details)
+        logger.exception("✗ Screening failed: %s", e)
+        
+        # Background tasks only run after a successful response, so save now
+        await asyncio.to_thread(_persist_resumes, parsed_resumes, output_folder)
         
         raise HTTPException(
             status_code=500,
@@ -308,9 +575,15 @@ async def parse_and_screen(
         )
 
 
+@lru_cache(maxsize=8)
+def get_counter_file(output_folder: str) -> str:
+    """Get path to the candidate counter file inside output_folder"""
+    return os.path.join(output_folder, ".counter")
+
+
 def get_candidate_counter(output_folder: str) -> int:
     """Get current candidate counter"""
-    counter_file = os.path.join(output_folder, ".counter")
+    counter_file = get_counter_file(output_folder)
     if os.path.exists(counter_file):
         try:
             with open(counter_file, 'r') as f:
@@ -322,7 +595,7 @@ def get_candidate_counter(output_folder: str) -> int:
 
 def update_candidate_counter(output_folder: str, count: int):
     """Update candidate counter"""
-    counter_file = os.path.join(output_folder, ".counter")
+    counter_file = get_counter_file(output_folder)
     os.makedirs(output_folder, exist_ok=True)
     with open(counter_file, 'w') as f:
         f.write(str(count))
@@ -332,9 +605,14 @@ def get_total_candidates(output_folder: str) -> int:
     """Count total JSON files in folder"""
     if not os.path.exists(output_folder):
         return 0
-    return len([f for f in os.listdir(output_folder) if f.endswith('.json')])
+    with os.scandir(output_folder) as entries:
+        return sum(
+            1 for entry in entries
+            if entry.name.endswith('.json') and entry.is_file(follow_symlinks=False)
+        )
 
 
+@lru_cache(maxsize=1)
 def get_output_folder() -> str:
     """Get absolute path to parsed_resumes folder"""
     # Get project root (3 levels up from routes.py: routes.py -> api -> app -> backend -> root)
@@ -347,10 +625,15 @@ def get_output_folder() -> str:
 @router.post("/batch-parse")
 async def batch_parse_resumes(
     background_tasks: BackgroundTasks,
-    files: List[UploadFile] = File(...)
+    files: List[UploadFile] = File(...),
+    stream: bool = False,
+    resume_parser: ResumeParser = Depends(get_resume_parser)
 ):
     """
     Parse multiple resume PDF files and save to data/parsed_resumes/ with incrementing counter
+    
+    With ?stream=true the response is NDJSON: one line per resume as soon as it
+    is saved, then a final line with the batch summary.
     """
     for file in files:
         if not file.filename.endswith('.pdf'):
@@ -366,87 +649,40 @@ async def batch_parse_resumes(
     current_counter = get_candidate_counter(output_folder)
     starting_counter = current_counter
     
-    print(f"Starting counter: {current_counter}")
+    logger.info("Starting counter: %d", current_counter)
     
-    for file in files:
-        try:
-            file_content = await file.read()
-            
-            if len(file_content) > settings.MAX_FILE_SIZE:
-                results.append({
-                    "filename": file.filename,
-                    "status": "failed",
-                    "error": f"File size exceeds {settings.MAX_FILE_SIZE} bytes"
-                })
-                continue
-            
-            file_id = str(uuid.uuid4())
-            temp_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.pdf")
-            
-            with open(temp_path, "wb") as f:
-                f.write(file_content)
-            
+    if stream:
+        # Read uploads now, while the request body is still open, then parse
+        # them in the response generator
+        staged = list(await asyncio.gather(*[_stage_upload(file) for file in files]))
+        return StreamingResponse(
+            _stream_batch_parse(staged, resume_parser, output_folder, starting_counter),
+            media_type="application/x-ndjson"
+        )
+    
+    # Phase 1: read uploads and extract their text
+    uploads = await _extract_uploads(files, resume_parser)
+    
+    # Phase 2: parse all extracted texts in one batched LLM pass
+    await _parse_uploads(uploads, resume_parser)
+    
+    # Phase 3: write parsed JSONs
+    for upload in uploads:
+        if "error" not in upload:
             current_counter += 1
-            print(f"Parsing resume as candidate_{current_counter}: {file.filename}")
-            parsed_data = await resume_parser.parse(temp_path)
-            
-            if 'analysis' in parsed_data:
-                del parsed_data['analysis']
-            
-            parsed_data['_id'] = f"candidate_{current_counter}"
-            
-            output_path = os.path.join(output_folder, f"candidate_{current_counter}.json")
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(parsed_data, f, indent=2, ensure_ascii=False)
-            
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-            
-            results.append({
-                "filename": file.filename,
-                "status": "success",
-                "saved_as": f"candidate_{current_counter}.json",
-                "output_path": output_path
-            })
-            
-            print(f"✓ Saved as candidate_{current_counter}.json")
-        
-        except Exception as e:
-            print(f"✗ Failed to parse {file.filename}: {str(e)}")
-            results.append({
-                "filename": file.filename,
-                "status": "failed",
-                "error": str(e)
-            })
-            
-            if 'temp_path' in locals() and os.path.exists(temp_path):
-                os.remove(temp_path)
+        results.append(_save_candidate(upload, output_folder, current_counter))
     
     update_candidate_counter(output_folder, current_counter)
-    print(f"Updated counter to: {current_counter}")
-    
-    successful = sum(1 for r in results if r['status'] == 'success')
-    failed = len(files) - successful
-    total_in_db = get_total_candidates(output_folder)
+    logger.info("Updated counter to: %d", current_counter)
     
-    return {
-        "success": True,
-        "total_files": len(files),
-        "parsed_successfully": successful,
-        "failed": failed,
-        "new_candidates": successful,
-        "total_in_database": total_in_db,
-        "counter_range": f"{starting_counter + 1}-{current_counter}" if successful > 0 else "none",
-        "output_folder": output_folder,
-        "results": results,
-        "parsed_at": datetime.now().isoformat()
-    }
+    return _batch_summary(len(files), results, starting_counter, current_counter, output_folder)
 
 
 @router.post("/parse", response_model=dict)
 async def parse_resume(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    resume_parser: ResumeParser = Depends(get_resume_parser),
+    resume_analyzer: ResumeAnalyzer = Depends(get_resume_analyzer)
 ):
     """
     Parse a resume PDF file and analyze it
@@ -458,35 +694,29 @@ async def parse_resume(
             detail="Only PDF files are allowed"
         )
     
-    # Check file size
-    file_content = await file.read()
-    if len(file_content) > settings.MAX_FILE_SIZE:
+    # Read the file into memory, checking size as it streams in
+    try:
+        pdf_bytes = await read_upload(file)
+    except ValueError as e:
         raise HTTPException(
             status_code=400,
-            detail=f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE} bytes"
+            detail=str(e)
         )
     
-    # Save file temporarily
-    file_id = str(uuid.uuid4())
-    file_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.pdf")
-    
     try:
-        with open(file_path, "wb") as f:
-            f.write(file_content)
-        
         # Parse the resume
-        print(f"Parsing resume: {file.filename}")
-        parsed_data = await resume_parser.parse(file_path)
+        logger.info("Parsing resume: %s", file.filename)
+        parsed_data = await resume_parser.parse(pdf_bytes)
         
         # Analyze the resume (if enabled in config)
         if settings.RUN_ANALYSIS:
             try:
-                print(f"Analyzing resume: {file.filename}")
+                logger.info("Analyzing resume: %s", file.filename)
                 analysis = await resume_analyzer.analyze(parsed_data)
                 parsed_data['analysis'] = analysis
-                print(f"Analysis complete. Overall score: {analysis.get('overall_score', 'N/A')}/100")
+                logger.info("Analysis complete. Overall score: %s/100", analysis.get('overall_score', 'N/A'))
             except Exception as e:
-                print(f"Analysis failed: {str(e)}")
+                logger.warning("Analysis failed: %s", e)
                 # Continue without analysis if it fails
                 parsed_data['analysis'] = {
                     "error": "Analysis failed",
@@ -497,10 +727,6 @@ async def parse_resume(
         # Validate parsed data
         validated_data = validate_parsed_data(parsed_data)
         
-        # Schedule file cleanup
-        if settings.AUTO_DELETE_UPLOADS:
-            background_tasks.add_task(cleanup_file, file_path)
-        
         return {
             "success": True,
             "data": validated_data,
@@ -509,13 +735,7 @@ async def parse_resume(
         }
     
     except Exception as e:
-        # Clean up file on error
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"Error details: {error_details}")
+        logger.exception("Error parsing resume %s", file.filename)
         
         raise HTTPException(
             status_code=500,
@@ -525,8 +745,8 @@ async def parse_resume(
 
 @router.post("/extract-text")
 async def extract_text(
-    background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    pdf_extractor: PDFExtractor = Depends(get_pdf_extractor)
 ):
     """
     Extract raw text from PDF (for debugging/testing)
@@ -537,18 +757,16 @@ async def extract_text(
             detail="Only PDF files are allowed"
         )
     
-    file_content = await file.read()
-    file_id = str(uuid.uuid4())
-    file_path = os.path.join(settings.UPLOAD_DIR, f"{file_id}.pdf")
+    try:
+        pdf_bytes = await read_upload(file)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
     
     try:
-        with open(file_path, "wb") as f:
-            f.write(file_content)
-        
-        extracted_text = pdf_extractor.extract_text(file_path)
-        
-        if settings.AUTO_DELETE_UPLOADS:
-            background_tasks.add_task(cleanup_file, file_path)
+        extracted_text = await pdf_extractor.extract_text_async(pdf_bytes)
         
         return {
             "success": True,
@@ -558,9 +776,6 @@ async def extract_text(
         }
     
     except Exception as e:
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        
         raise HTTPException(
             status_code=500,
             detail=f"Error extracting text: {str(e)}"
@@ -568,7 +783,9 @@ async def extract_text(
 
 
 @router.get("/models")
-async def get_available_models():
+async def get_available_models(
+    ollama_service: OllamaService = Depends(get_ollama_service)
+):
     """
     Get list of available Ollama models
     """
@@ -587,7 +804,9 @@ async def get_available_models():
 
 
 @router.get("/test-ollama")
-async def test_ollama():
+async def test_ollama(
+    ollama_service: OllamaService = Depends(get_ollama_service)
+):
     """
     Test Ollama connection and model
     """
@@ -609,7 +828,9 @@ async def test_ollama():
 
 
 @router.get("/analysis-weights")
-async def get_analysis_weights():
+async def get_analysis_weights(
+    resume_analyzer: ResumeAnalyzer = Depends(get_resume_analyzer)
+):
     """
     Get current analysis scoring weights
     """
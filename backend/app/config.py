@@ -1,10 +1,11 @@
 """
 Configuration settings for Resume Parser API
 """
-from pydantic_settings import BaseSettings
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import List
+from functools import lru_cache
 import os
-from pathlib import Path
 
 
 class Settings(BaseSettings):
@@ -20,31 +21,40 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     
     # CORS Settings
-    CORS_ORIGINS: List[str] = [
+    CORS_ORIGINS: List[str] = Field(default_factory=lambda: [
         "http://localhost:3000",
         "http://localhost:5173",
         "http://localhost:8080",
-    ]
+        "null",  # frontend/index.html opened straight from disk (file://)
+    ])
     
     # Ollama Settings
     OLLAMA_BASE_URL: str = "http://localhost:11434"
-    OLLAMA_MODEL: str = "llama3.1:8b"
+    OLLAMA_MODEL: str = "llama3.1:8b-instruct-q4_K_M"  # 4-bit Q4_K_M quantization
     OLLAMA_TIMEOUT: int = 300  # seconds (5 minutes)
     OLLAMA_TEMPERATURE: float = 0.1  # Lower = more deterministic
+    OLLAMA_KEEP_ALIVE: int = -1  # Seconds to keep the model loaded; -1 = never unload
+    OLLAMA_NUM_CTX: int = 8192  # Context window (KV cache) per request
+    OLLAMA_NUM_BATCH: int = 512  # Prompt tokens processed per prefill step
+    OLLAMA_HEALTH_INTERVAL: int = 10  # Seconds between background Ollama health probes
+    OLLAMA_PARALLEL: int = 2  # Generations in flight at once; match the server's OLLAMA_NUM_PARALLEL
     
     # Alternative models you can use:
-    # - llama3.1:8b (recommended for speed/accuracy balance)
-    # - llama3.1:70b (more accurate, slower)
-    # - mistral:7b (good alternative)
-    # - gemma2:9b (another good option)
+    # - llama3.1:8b-instruct-q4_K_M (recommended for speed/accuracy balance)
+    # - llama3.1:8b-instruct-q8_0 (slightly more accurate, ~2x memory bandwidth)
+    # - llama3.1:70b-instruct-q4_K_M (more accurate, slower)
+    # - mistral:7b-instruct-q4_K_M (good alternative)
+    # - gemma2:9b-instruct-q4_K_M (another good option)
+    # Q4_K_M tags halve weight memory vs Q8, which is what bounds decode speed
+    # and how many concurrent contexts fit in VRAM.
     
     # File Upload Settings
-    UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB in bytes
-    ALLOWED_EXTENSIONS: List[str] = [".pdf"]
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # 1MB chunks when reading uploads into memory
+    ALLOWED_EXTENSIONS: List[str] = Field(default_factory=lambda: [".pdf"])
     
     # PDF Processing Settings
-    PDF_EXTRACTION_METHOD: str = "pdfplumber"  # Options: pdfplumber, pypdf2, pymupdf
+    PDF_EXTRACTION_METHOD: str = "pypdfium2"  # Options: pypdfium2, pymupdf, pdfplumber
     USE_OCR_FALLBACK: bool = True  # Use OCR if text extraction fails
     OCR_LANGUAGE: str = "eng"  # Tesseract language code
     
@@ -52,6 +62,10 @@ class Settings(BaseSettings):
     MAX_TOKENS: int = 4000  # Maximum tokens for LLM context
     RETRY_ATTEMPTS: int = 3  # Number of retry attempts for failed parsing
     RETRY_DELAY: int = 2  # Seconds to wait between retries
+    MAX_CONCURRENT_PARSES: int = 4  # Uploads saved/extracted at once in batch endpoints
+    PARSE_BATCH_SIZE: int = 32  # Max resumes sent to Ollama per batch (use 128 on CUDA hosts)
+    RESUMES_PER_PROMPT: int = 1  # >1 packs several resumes into one LLM call (raise OLLAMA_NUM_CTX to match)
+    PARSE_CACHE_SIZE: int = 256  # Parsed resumes kept in memory by PDF content hash (0 = off)
     
     # Analysis Settings
     RUN_ANALYSIS: bool = True  # Enable/disable resume analysis
@@ -59,7 +73,7 @@ class Settings(BaseSettings):
     ANALYSIS_TEMPERATURE: float = 0.1  # Temperature for analysis (lower = more consistent)
     
     # Resume Sections to Extract (can be customized)
-    EXTRACT_SECTIONS: List[str] = [
+    EXTRACT_SECTIONS: List[str] = Field(default_factory=lambda: [
         "personal_info",
         "summary",
         "experience",
@@ -69,7 +83,7 @@ class Settings(BaseSettings):
         "projects",
         "languages",
         "achievements"
-    ]
+    ])
     
     # Validation Settings
     VALIDATE_EMAIL: bool = True
@@ -80,20 +94,17 @@ class Settings(BaseSettings):
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "resume_parser.log"
     
-    # Cleanup Settings
-    AUTO_DELETE_UPLOADS: bool = True  # Delete uploaded files after processing
-    UPLOAD_RETENTION_HOURS: int = 1  # How long to keep uploads before cleanup
+    # Storage Settings
+    DURABILITY: str = "relaxed"  # Options: relaxed, strict (fsync each parsed resume before it's renamed into place)
     
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = True
-    
-    def get_upload_path(self) -> Path:
-        """
-        Get the absolute path for uploads directory
-        """
-        return Path(self.UPLOAD_DIR).absolute()
+    # Frozen: one validated instance is shared by every request and thread
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=True,
+        extra="ignore",
+        frozen=True
+    )
     
     def is_allowed_file(self, filename: str) -> bool:
         """
@@ -108,100 +119,16 @@ class Settings(BaseSettings):
         return f"{self.OLLAMA_BASE_URL}/api/{endpoint}"
 
 
-# Create settings instance
-settings = Settings()
-
-
-# Prompt templates for different parsing strategies
-PROMPTS = {
-    "main_parser": """You are an expert resume parser. Extract information from the following resume text and return it as valid JSON.
-
-Resume Text:
-{resume_text}
-
-Extract the following information and return ONLY a valid JSON object with this exact structure:
-
-{{
-    "personal_info": {{
-        "name": "Full name",
-        "email": "email@example.com",
-        "phone": "phone number",
-        "location": "city, state/country",
-        "linkedin": "LinkedIn URL if present",
-        "github": "GitHub URL if present",
-        "website": "Personal website if present"
-    }},
-    "summary": "Professional summary or objective",
-    "experience": [
-        {{
-            "company": "Company name",
-            "position": "Job title",
-            "location": "Location",
-            "start_date": "Start date",
-            "end_date": "End date or 'Present'",
-            "responsibilities": ["Responsibility 1", "Responsibility 2"]
-        }}
-    ],
-    "education": [
-        {{
-            "institution": "School/University name",
-            "degree": "Degree type and major",
-            "location": "Location",
-            "start_date": "Start date",
-            "end_date": "End date or 'Present'",
-            "gpa": "GPA if present"
-        }}
-    ],
-    "skills": {{
-        "technical": ["skill1", "skill2"],
-        "soft_skills": ["skill1", "skill2"],
-        "tools": ["tool1", "tool2"]
-    }},
-    "certifications": [
-        {{
-            "name": "Certification name",
-            "issuer": "Issuing organization",
-            "date": "Date obtained"
-        }}
-    ],
-    "projects": [
-        {{
-            "name": "Project name",
-            "description": "Brief description",
-            "technologies": ["tech1", "tech2"],
-            "link": "Project link if available"
-        }}
-    ],
-    "languages": ["Language1", "Language2"],
-    "achievements": ["Achievement 1", "Achievement 2"]
-}}
-
-Important rules:
-1. Return ONLY valid JSON, no additional text or explanations
-2. Use null for missing information
-3. Keep arrays empty [] if section not found
-4. Preserve exact dates and formatting from resume
-5. Don't invent or assume information not in the resume
-6. If a section is completely missing, include it with null or empty values
-
-Return the JSON now:""",
-
-    "extraction_verification": """Review this extracted resume data for accuracy and completeness. The original resume text is:
-
-{resume_text}
-
-Extracted Data:
-{extracted_data}
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Build the settings once and return the cached instance
+    """
+    return Settings()
 
-Verify:
-1. All dates are correctly formatted
-2. Email and phone numbers are valid
-3. No information is duplicated
-4. All experiences are chronologically ordered (most recent first)
-5. Skills are properly categorized
 
-Return the corrected JSON if any issues found, or the same JSON if everything is correct."""
-}
+# Create settings instance
+settings = get_settings()
 
 
 # Model configuration for different Ollama models
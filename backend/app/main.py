@@ -1,15 +1,78 @@
 """
 FastAPI Resume Parser - Main Application Entry Point
 """
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 import uvicorn
 import os
+import asyncio
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import time
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from typing import Tuple
 
 from app.config import settings
 from app.api import routes
+from app.services.pdf_extractor import PDFExtractor
+from app.services.ollama_service import OllamaService, create_http_client
+from app.services.parser import ResumeParser
+from app.services.resume_analyzer import ResumeAnalyzer
+from app.utils.prompts import MAIN_PARSER_PREFIX
+
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging() -> Tuple[logging.handlers.QueueListener, logging.Handler]:
+    """
+    Route app logging through a queue so request handlers never block on
+    stdout; a QueueListener thread does the actual writing.
+    
+    Returns the listener and the root QueueHandler; on shutdown, stop the
+    listener and remove the handler (see teardown_logging).
+    """
+    log_queue = queue.SimpleQueue()
+    
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    root = logging.getLogger()
+    root.setLevel(settings.LOG_LEVEL.upper())
+    root.addHandler(queue_handler)
+    
+    # pdfminer (used by pdfplumber) logs every page at DEBUG
+    logging.getLogger("pdfminer").setLevel(logging.WARNING)
+    
+    listener.start()
+    return listener, queue_handler
+
+
+def teardown_logging(listener: logging.handlers.QueueListener, handler: logging.Handler):
+    """
+    Flush and stop the listener, then detach its QueueHandler from the root
+    logger so nothing is queued with no reader (or duplicated on re-entry)
+    """
+    listener.stop()
+    logging.getLogger().removeHandler(handler)
+
+
+async def poll_ollama(app: FastAPI):
+    """
+    Probe Ollama every OLLAMA_HEALTH_INTERVAL seconds and cache the result on
+    app.state, so /health never makes an outbound call
+    """
+    while True:
+        app.state.ollama_healthy = await app.state.ollama_service.check_connection()
+        app.state.ollama_last_check = time.time()
+        await asyncio.sleep(settings.OLLAMA_HEALTH_INTERVAL)
 
 
 @asynccontextmanager
@@ -17,27 +80,66 @@ async def lifespan(app: FastAPI):
     """
     Lifespan event handler for startup and shutdown events
     """
-    # Startup: Create uploads directory if it doesn't exist
-    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-    print(f"✓ Upload directory created/verified at: {settings.UPLOAD_DIR}")
+    log_listener, log_handler = setup_logging()
+    
+    # Size the thread pool used by asyncio.to_thread for PDF extraction
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=os.cpu_count())
+    )
+    
+    # Build the services once per worker; routes get them through Depends.
+    # Pool workers are spawned, not forked: they'd be forked lazily from a
+    # process whose threads may hold locks (e.g. the PDFium one) mid-request
+    app.state.pool = ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        mp_context=multiprocessing.get_context("spawn")
+    )
+    app.state.pdf_extractor = PDFExtractor(executor=app.state.pool)
+    app.state.http = create_http_client()
+    app.state.ollama_service = OllamaService(app.state.http)
+    app.state.resume_parser = ResumeParser(app.state.pdf_extractor, app.state.ollama_service)
+    app.state.resume_analyzer = ResumeAnalyzer(app.state.ollama_service)
+    app.state.screening_client = routes.ScreeningClient()
+    ollama_service = app.state.ollama_service
     
     # Verify Ollama connection
     try:
-        import requests
-        response = requests.get(f"{settings.OLLAMA_BASE_URL}/api/tags", timeout=5)
-        if response.status_code == 200:
-            print(f"✓ Connected to Ollama at: {settings.OLLAMA_BASE_URL}")
-            print(f"✓ Using model: {settings.OLLAMA_MODEL}")
-        else:
-            print(f"⚠ Warning: Could not verify Ollama connection")
+        # Goes through the service's pooled client, so this also warms the connection
+        models = await ollama_service.list_models()
+        logger.info("✓ Connected to Ollama at: %s", settings.OLLAMA_BASE_URL)
+        logger.info("✓ Using model: %s", settings.OLLAMA_MODEL)
+        
+        # Never download at startup (the app is meant to run offline); just
+        # say how to fetch the configured (quantized) tag if it's missing
+        local_models = [m.get("name") for m in models]
+        if settings.OLLAMA_MODEL not in local_models:
+            logger.warning("⚠ Model %s is not available locally", settings.OLLAMA_MODEL)
+            logger.warning("Please pull it with: ollama pull %s", settings.OLLAMA_MODEL)
+        
+        # Preload the model so the first /parse doesn't pay the load time
+        await ollama_service.warmup()
+        logger.info("✓ Model preloaded (keep_alive=%s)", settings.OLLAMA_KEEP_ALIVE)
+        
+        # Prefill the parser prompt's fixed prefix so requests reuse its KV cache
+        await ollama_service.prime_prefix(MAIN_PARSER_PREFIX)
+        logger.info("✓ Parser prompt prefix cached")
     except Exception as e:
-        print(f"⚠ Warning: Ollama might not be running - {str(e)}")
-        print(f"  Please start Ollama with: ollama serve")
+        logger.warning("⚠ Ollama might not be running - %s", e)
+        logger.warning("Please start Ollama with: ollama serve")
+    
+    app.state.ollama_healthy = False
+    app.state.ollama_last_check = 0.0
+    health_task = asyncio.create_task(poll_ollama(app))
     
     yield
     
     # Shutdown: Cleanup (optional)
-    print("Shutting down Resume Parser API...")
+    logger.info("Shutting down Resume Parser API...")
+    health_task.cancel()
+    await app.state.http.aclose()
+    await app.state.screening_client.aclose()
+    await asyncio.to_thread(app.state.pool.shutdown, True, cancel_futures=True)
+    teardown_logging(log_listener, log_handler)
 
 
 # Initialize FastAPI app
@@ -45,16 +147,18 @@ app = FastAPI(
     title="Resume Parser API",
     description="Parse PDF resumes using Ollama LLM models",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Configure CORS
+# Configure CORS (explicit lists, preflights cached by the browser for a day)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # or ["http://localhost:3000"] for stricter policy
+    allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "DELETE"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,
 )
 
 
@@ -78,27 +182,28 @@ async def root():
 
 # Health check endpoint
 @app.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """
     Health check endpoint to verify API and Ollama status
+    
+    Ollama status comes from the background probe (see poll_ollama).
     """
     health_status = {
         "api": "healthy",
         "ollama": "unknown"
     }
     
-    try:
-        import requests
-        response = requests.get(f"{settings.OLLAMA_BASE_URL}/api/tags", timeout=5)
-        if response.status_code == 200:
+    state = request.app.state
+    
+    if state.ollama_last_check:
+        health_status["last_check"] = datetime.fromtimestamp(state.ollama_last_check).isoformat()
+        
+        if state.ollama_healthy:
             health_status["ollama"] = "healthy"
             health_status["ollama_url"] = settings.OLLAMA_BASE_URL
             health_status["model"] = settings.OLLAMA_MODEL
         else:
             health_status["ollama"] = "unhealthy"
-    except Exception as e:
-        health_status["ollama"] = "unreachable"
-        health_status["error"] = str(e)
     
     return health_status
 
@@ -1,44 +1,83 @@
 """
 Ollama Service - Interface with Ollama API
 """
-import requests
-import json
-from typing import Optional, Dict, List
+import httpx
+import orjson
+from typing import Optional, Dict, List, AsyncIterator, Union
 import asyncio
+import logging
+import re
 from app.config import settings, MODEL_CONFIGS
 
 
+logger = logging.getLogger(__name__)
+
+# Characters that matter when scanning for a JSON object's boundaries
+_JSON_STRUCTURE = re.compile(r'[{}"\\]')
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Create the pooled async HTTP client used to talk to Ollama
+    """
+    return httpx.AsyncClient(
+        base_url=settings.OLLAMA_BASE_URL,
+        timeout=settings.OLLAMA_TIMEOUT,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+    )
+
+
 class OllamaService:
     """
     Service to interact with Ollama API
     """
     
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.base_url = settings.OLLAMA_BASE_URL
         self.model = settings.OLLAMA_MODEL
         self.timeout = settings.OLLAMA_TIMEOUT
         self.temperature = settings.OLLAMA_TEMPERATURE
+        self.keep_alive = settings.OLLAMA_KEEP_ALIVE
+        
+        # One pooled client for every call so requests reuse keep-alive
+        # connections instead of reconnecting per resume. The app lifespan
+        # passes in (and closes) its shared client.
+        self._owns_client = client is None
+        self._client = client or create_http_client()
+    
+    async def aclose(self):
+        """
+        Close the pooled HTTP client if this service created it
+        """
+        if self._owns_client:
+            await self._client.aclose()
     
     async def generate(
         self, 
         prompt: str, 
         system_prompt: Optional[str] = None,
         temperature: Optional[float] = None,
-        stream: bool = False
+        stream: bool = False,
+        schema: Optional[Dict] = None,
+        num_predict: int = 4096
     ) -> str:
         """
         Generate text using Ollama model
-        """
-        url = f"{self.base_url}/api/generate"
         
+        Passing a JSON schema makes Ollama constrain decoding to it; otherwise
+        the reply is only required to be some JSON.
+        """
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "format": "json",
+            "format": schema or "json",
             "stream": stream,
+            "keep_alive": self.keep_alive,
             "options": {
                 "temperature": temperature or self.temperature,
-                "num_predict": 4096,  # Allow longer responses
+                "num_predict": num_predict,
+                "num_ctx": settings.OLLAMA_NUM_CTX,
+                "num_batch": settings.OLLAMA_NUM_BATCH,
                 "top_k": 40,
                 "top_p": 0.9,
             }
@@ -48,22 +87,20 @@ class OllamaService:
             payload["system"] = system_prompt
         
         try:
-            response = requests.post(
-                url,
-                json=payload,
-                timeout=self.timeout
-            )
+            if stream:
+                async with self._client.stream("POST", "/api/generate", json=payload) as response:
+                    response.raise_for_status()
+                    return await self._collect_json_stream(response)
+            
+            response = await self._client.post("/api/generate", json=payload)
             response.raise_for_status()
             
-            if stream:
-                return self._handle_streaming_response(response)
-            else:
-                result = response.json()
-                return result.get("response", "")
+            result = orjson.loads(response.content)
+            return result.get("response", "")
         
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             raise Exception(f"Ollama request timed out after {self.timeout} seconds")
-        except requests.exceptions.ConnectionError:
+        except httpx.ConnectError:
             raise Exception(f"Cannot connect to Ollama at {self.base_url}. Is Ollama running?")
         except Exception as e:
             raise Exception(f"Ollama generation error: {str(e)}")
@@ -76,26 +113,23 @@ class OllamaService:
         """
         Chat with Ollama model using conversation format
         """
-        url = f"{self.base_url}/api/chat"
-        
         payload = {
             "model": self.model,
             "messages": messages,
             "stream": False,
+            "keep_alive": self.keep_alive,
             "options": {
                 "temperature": temperature or self.temperature,
+                "num_ctx": settings.OLLAMA_NUM_CTX,
+                "num_batch": settings.OLLAMA_NUM_BATCH,
             }
         }
         
         try:
-            response = requests.post(
-                url,
-                json=payload,
-                timeout=self.timeout
-            )
+            response = await self._client.post("/api/chat", json=payload)
             response.raise_for_status()
             
-            result = response.json()
+            result = orjson.loads(response.content)
             return result.get("message", {}).get("content", "")
         
         except Exception as e:
@@ -105,41 +139,49 @@ class OllamaService:
         self,
         prompt: str,
         system_prompt: Optional[str] = None,
-        retry_attempts: int = 3
-    ) -> Dict:
+        retry_attempts: int = 3,
+        schema: Optional[Dict] = None,
+        num_predict: int = 4096
+    ) -> Union[Dict, List]:
         """
         Generate JSON response with automatic retry on parse failures
         """
         for attempt in range(retry_attempts):
             try:
-                print(f"Attempt {attempt + 1}/{retry_attempts} - Calling Ollama...")
+                logger.debug("Attempt %d/%d - Calling Ollama...", attempt + 1, retry_attempts)
                 
                 response_text = await self.generate(
                     prompt=prompt,
                     system_prompt=system_prompt,
-                    temperature=0.05  # Very low temperature for consistent JSON
+                    temperature=0.05,  # Very low temperature for consistent JSON
+                    stream=True,  # Stop reading as soon as the JSON object closes
+                    schema=schema,
+                    num_predict=num_predict
                 )
                 
-                print(f"Received response ({len(response_text)} chars)")
+                logger.debug("Received response (%d chars)", len(response_text))
                 
                 # Try to extract JSON from response
                 json_data = self._extract_json(response_text)
                 
-                print("Successfully parsed JSON")
+                logger.debug("Successfully parsed JSON")
                 return json_data
             
-            except json.JSONDecodeError as e:
-                print(f"JSON parse error on attempt {attempt + 1}: {str(e)}")
-                print(f"Response text: {response_text[:500]}...")  # Print first 500 chars
+            except orjson.JSONDecodeError as e:
+                logger.warning("JSON parse error on attempt %d: %s", attempt + 1, e)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Response text: %s...", response_text[:500])  # Log first 500 chars
                 
                 if attempt < retry_attempts - 1:
-                    # Retry with more explicit instructions
-                    prompt = prompt + "\n\nRETURN ONLY VALID JSON. Start with { and end with }. No markdown, no code blocks."
+                    # Retry with more explicit instructions (a schema already
+                    # constrains the output, so there it would only add tokens)
+                    if schema is None:
+                        prompt = prompt + "\n\nRETURN ONLY VALID JSON. Start with { and end with }. No markdown, no code blocks."
                     await asyncio.sleep(2)
                 else:
                     raise Exception(f"Failed to parse JSON after {retry_attempts} attempts: {str(e)}\nResponse: {response_text[:1000]}")
             except Exception as e:
-                print(f"Error on attempt {attempt + 1}: {str(e)}")
+                logger.warning("Error on attempt %d: %s", attempt + 1, e)
                 if attempt < retry_attempts - 1:
                     await asyncio.sleep(2)
                 else:
@@ -149,61 +191,163 @@ class OllamaService:
         """
         Extract JSON from text response (handles markdown code blocks)
         """
-        # Remove markdown code blocks if present
-        text = text.strip()
-        
-        # Try to find JSON in markdown code block
-        if "```json" in text:
-            start = text.find("```json") + 7
-            end = text.find("```", start)
-            text = text[start:end].strip()
-        elif "```" in text:
-            start = text.find("```") + 3
-            end = text.find("```", start)
-            text = text[start:end].strip()
-        
-        # Try to find JSON object boundaries
-        if not text.startswith('{'):
-            start = text.find('{')
-            if start != -1:
-                text = text[start:]
-        
-        if not text.endswith('}'):
-            end = text.rfind('}')
-            if end != -1:
-                text = text[:end+1]
+        # With format=json the reply is normally clean JSON already
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+        
+        # Otherwise pull the first balanced object out of the surrounding
+        # text / code fences
+        json_text = self._find_json_object(text)
         
         # Parse JSON
-        return json.loads(text)
+        return orjson.loads(json_text if json_text is not None else text)
     
-    def _handle_streaming_response(self, response) -> str:
+    def _find_json_object(self, text: str) -> Optional[str]:
         """
-        Handle streaming response from Ollama
+        Return the first balanced {...} in text, or None
+        
+        A single forward scan that jumps between structural characters and
+        ignores braces inside string literals (which rfind('}') would not).
         """
-        full_response = ""
+        start = text.find('{')
+        if start == -1:
+            return None
+        
+        depth = 0
+        in_string = False
+        escaped_pos = -1
         
-        for line in response.iter_lines():
+        for match in _JSON_STRUCTURE.finditer(text, start):
+            pos = match.start()
+            ch = match.group()
+            
+            if in_string:
+                if pos == escaped_pos:
+                    continue
+                if ch == "\\":
+                    escaped_pos = pos + 1
+                elif ch == '"':
+                    in_string = False
+            elif ch == '"':
+                in_string = True
+            elif ch == '{':
+                depth += 1
+            elif ch == '}':
+                depth -= 1
+                if depth == 0:
+                    return text[start:pos + 1]
+        
+        return None
+    
+    async def _stream_tokens(self, response: httpx.Response) -> AsyncIterator[str]:
+        """
+        Yield response tokens from a streaming Ollama reply as they arrive
+        """
+        async for line in response.aiter_lines():
             if line:
                 try:
-                    json_response = json.loads(line)
+                    json_response = orjson.loads(line)
                     if "response" in json_response:
-                        full_response += json_response["response"]
-                except json.JSONDecodeError:
+                        yield json_response["response"]
+                except orjson.JSONDecodeError:
                     continue
+    
+    async def _collect_json_stream(self, response: httpx.Response) -> str:
+        """
+        Collect a streamed JSON reply, stopping once the top-level value closes
         
-        return full_response
+        Leaving the stream early closes the request, so Ollama stops generating
+        trailing whitespace/tokens nobody will read.
+        """
+        parts = []
+        depth = 0
+        started = False
+        in_string = False
+        escaped = False
+        
+        async for token in self._stream_tokens(response):
+            parts.append(token)
+            
+            for ch in token:
+                if in_string:
+                    if escaped:
+                        escaped = False
+                    elif ch == "\\":
+                        escaped = True
+                    elif ch == '"':
+                        in_string = False
+                elif ch == '"':
+                    in_string = True
+                elif ch in "{[":
+                    depth += 1
+                    started = True
+                elif ch in "}]":
+                    depth -= 1
+            
+            if started and depth <= 0:
+                break
+        
+        return "".join(parts)
+    
+    async def warmup(self) -> bool:
+        """
+        Load the model into memory ahead of the first request
+        
+        An empty prompt makes Ollama load the model without generating anything;
+        keep_alive pins it so it is not evicted between requests.
+        """
+        payload = {
+            "model": self.model,
+            "prompt": "",
+            "keep_alive": self.keep_alive
+        }
+        
+        try:
+            response = await self._client.post("/api/generate", json=payload)
+            response.raise_for_status()
+            return True
+        
+        except Exception as e:
+            raise Exception(f"Failed to preload model: {str(e)}")
+    
+    async def prime_prefix(self, prefix: str) -> bool:
+        """
+        Prefill a static prompt prefix so later calls sharing it reuse the KV cache
+        
+        Uses the same num_ctx/num_batch as real calls (a different context size
+        would reload the model) and generates a single token.
+        """
+        payload = {
+            "model": self.model,
+            "prompt": prefix,
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": {
+                "num_predict": 1,
+                "num_ctx": settings.OLLAMA_NUM_CTX,
+                "num_batch": settings.OLLAMA_NUM_BATCH,
+            }
+        }
+        
+        try:
+            response = await self._client.post("/api/generate", json=payload)
+            response.raise_for_status()
+            return True
+        
+        except Exception as e:
+            raise Exception(f"Failed to prime prompt prefix: {str(e)}")
     
     async def list_models(self) -> List[Dict]:
         """
         List available Ollama models
         """
-        url = f"{self.base_url}/api/tags"
-        
         try:
-            response = requests.get(url, timeout=10)
+            response = await self._client.get("/api/tags", timeout=10)
             response.raise_for_status()
             
-            result = response.json()
+            result = orjson.loads(response.content)
             return result.get("models", [])
         
         except Exception as e:
@@ -213,27 +357,25 @@ class OllamaService:
         """
         Pull a model from Ollama registry
         """
-        url = f"{self.base_url}/api/pull"
-        
         payload = {
             "name": model_name,
             "stream": False
         }
         
         try:
-            response = requests.post(url, json=payload, timeout=300)
+            response = await self._client.post("/api/pull", json=payload, timeout=300)
             response.raise_for_status()
             return True
         
         except Exception as e:
             raise Exception(f"Failed to pull model: {str(e)}")
     
-    def check_connection(self) -> bool:
+    async def check_connection(self) -> bool:
         """
         Check if Ollama is accessible
         """
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = await self._client.get("/api/tags", timeout=5)
             return response.status_code == 200
         except:
             return False
\ No newline at end of file
@@ -1,12 +1,22 @@
 """
 Resume Parser Service - Orchestrates PDF extraction and LLM parsing
 """
-from typing import Dict
+from typing import Any, Dict, List, Tuple, Union
+from collections import OrderedDict
+import asyncio
+import copy
+import hashlib
 import json
-from app.services.pdf_extractor import PDFExtractor
+from app.services.pdf_extractor import PDFExtractor, PDFSource
 from app.services.ollama_service import OllamaService
 from app.config import settings
-from app.utils.prompts import get_prompt
+from app.utils.validators import PRESENT_DATES
+from app.utils.prompts import build_main_prompt, build_batch_prompt, RESUME_SCHEMA, RESUME_BATCH_SCHEMA, PROMPT_VERSION
+
+# A grouped prompt shares one OLLAMA_NUM_CTX window between the instructions
+# and every resume's text and reply; each resume gets at least this many tokens
+BATCH_INSTRUCTION_TOKENS = 512
+MIN_TOKENS_PER_GROUPED_RESUME = 2048
 
 
 class ResumeParser:
@@ -17,43 +27,202 @@ class ResumeParser:
     def __init__(self, pdf_extractor: PDFExtractor, ollama_service: OllamaService):
         self.pdf_extractor = pdf_extractor
         self.ollama_service = ollama_service
+        
+        # blake2b(pdf bytes) + model + prompt version -> processed resume
+        self._cache: OrderedDict = OrderedDict()
     
-    async def parse(self, pdf_path: str) -> Dict:
+    async def parse(self, pdf: PDFSource) -> Dict:
         """
-        Parse a resume PDF and return structured data
+        Parse a resume PDF (its bytes, or a path to it) and return structured data
+        
+        Re-uploads of an identical PDF are answered from an in-memory LRU keyed
+        on the file's content hash, skipping extraction and the LLM call.
         """
+        cache_key = await asyncio.to_thread(self._cache_key, pdf)
+        
+        if cache_key in self._cache:
+            self._cache.move_to_end(cache_key)
+            return copy.deepcopy(self._cache[cache_key])
+        
         # Step 1: Extract text from PDF
-        extracted_text = self.pdf_extractor.extract_text(pdf_path)
+        extracted_text = await self.extract(pdf)
+        
+        # Step 2 & 3: Parse with LLM, then post-process
+        processed_data = await self.parse_text(extracted_text)
+        
+        if settings.PARSE_CACHE_SIZE > 0:
+            self._cache[cache_key] = copy.deepcopy(processed_data)
+            if len(self._cache) > settings.PARSE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        
+        return processed_data
+    
+    def _cache_key(self, pdf: PDFSource) -> tuple:
+        """
+        Content-addressed cache key for a PDF
+        """
+        if not isinstance(pdf, bytes):
+            with open(pdf, 'rb') as f:
+                pdf = f.read()
+        digest = hashlib.blake2b(pdf, digest_size=16).digest()
+        return digest, settings.OLLAMA_MODEL, PROMPT_VERSION
+    
+    async def extract(self, pdf: PDFSource) -> str:
+        """
+        Extract resume text from a PDF, rejecting files with too little text
+        
+        Extraction is CPU-bound, so it runs off the event loop (in the
+        extractor's process pool for multi-page PDFs) to keep it free for
+        other requests.
+        """
+        extracted_text = await self.pdf_extractor.extract_text_async(pdf)
         
         if not extracted_text or len(extracted_text.strip()) < 50:
             raise Exception("Could not extract sufficient text from PDF. The file might be corrupted or empty.")
         
-        # Step 2: Parse with LLM
-        parsed_data = await self._parse_with_llm(extracted_text)
+        return extracted_text
+    
+    async def parse_text(self, text: str) -> Dict:
+        """
+        Parse already-extracted resume text into structured data
         
-        # Step 3: Post-process and validate
-        processed_data = self._post_process(parsed_data)
+        Post-processing is pure Python, so it also runs in the thread pool.
+        """
+        parsed_data = await self._parse_with_llm(text)
         
-        return processed_data
+        return await asyncio.to_thread(self._post_process, parsed_data)
     
-    async def _parse_with_llm(self, text: str) -> Dict:
+    async def parse_many(self, texts: List[str]) -> List[Union[Dict, Exception]]:
         """
-        Use LLM to parse resume text into structured format
+        Parse several extracted resume texts, dispatching them to Ollama in batches
+        
+        Ollama's /api/generate takes a single prompt per request, so each batch is
+        sent as concurrent requests that the server schedules into its parallel
+        slots. Results keep the input order; a failed resume yields its exception
+        instead of aborting the whole batch.
+        """
+        batch_size = max(1, settings.PARSE_BATCH_SIZE)
+        per_prompt = self._group_size(settings.RESUMES_PER_PROMPT)
+        results: List[Union[Dict, Exception]] = []
+        
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start:start + batch_size]
+            
+            if per_prompt == 1:
+                results.extend(await asyncio.gather(
+                    *[self.parse_text(text) for text in batch],
+                    return_exceptions=True
+                ))
+                continue
+            
+            groups = await asyncio.gather(*[
+                self._parse_group(batch[i:i + per_prompt])
+                for i in range(0, len(batch), per_prompt)
+            ])
+            for group in groups:
+                results.extend(group)
+        
+        return results
+    
+    async def parse_batch(self, pdf_paths: List[str], batch_size: int = 4) -> List[Union[Dict, Exception]]:
+        """
+        Parse several PDFs, packing up to batch_size resumes into each LLM call
+        
+        Extraction runs in parallel; results keep the input order and a failed
+        resume yields its exception. Groups are made smaller than batch_size
+        when that many resumes wouldn't fit in OLLAMA_NUM_CTX.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        
+        group_size = self._group_size(batch_size)
+        
+        extracted = await asyncio.gather(
+            *[self.extract(pdf_path) for pdf_path in pdf_paths],
+            return_exceptions=True
+        )
+        
+        texts = [text for text in extracted if not isinstance(text, Exception)]
+        
+        parsed = []
+        for start in range(0, len(texts), group_size):
+            parsed.extend(await self._parse_group(texts[start:start + group_size]))
+        
+        parsed_iter = iter(parsed)
+        return [text if isinstance(text, Exception) else next(parsed_iter) for text in extracted]
+    
+    async def _parse_group(self, texts: List[str]) -> List[Union[Dict, Exception]]:
+        """
+        Parse a group of resume texts with one schema-constrained LLM call
+        
+        The shared instructions are prefilled once for the whole group. If the
+        model doesn't return one object per resume, fall back to parsing them
+        one by one.
         """
-        # Truncate text if too long
-        max_chars = settings.MAX_TOKENS * 4  # Rough estimate: 1 token ≈ 4 chars
+        if len(texts) == 1:
+            return list(await asyncio.gather(self.parse_text(texts[0]), return_exceptions=True))
+        
+        # Split the context evenly: half of each resume's share for its text, half for its JSON
+        share = (settings.OLLAMA_NUM_CTX - BATCH_INSTRUCTION_TOKENS) // len(texts)
+        max_tokens = min(settings.MAX_TOKENS, share // 2)
+        prompt = build_batch_prompt([self._truncate(text, max_tokens) for text in texts])
+        
+        try:
+            parsed_group = await self.ollama_service.generate_json(
+                prompt=prompt,
+                retry_attempts=settings.RETRY_ATTEMPTS,
+                schema=RESUME_BATCH_SCHEMA,
+                num_predict=(share // 2) * len(texts)
+            )
+        except Exception:
+            parsed_group = None
+        
+        if not isinstance(parsed_group, list) or len(parsed_group) != len(texts):
+            return list(await asyncio.gather(
+                *[self.parse_text(text) for text in texts],
+                return_exceptions=True
+            ))
+        
+        return await asyncio.to_thread(lambda: [
+            self._post_process(parsed) if isinstance(parsed, dict)
+            else Exception("Failed to parse resume with LLM: expected a JSON object")
+            for parsed in parsed_group
+        ])
+    
+    def _group_size(self, requested: int) -> int:
+        """
+        Resumes per grouped prompt: at most `requested`, and few enough that
+        each still gets MIN_TOKENS_PER_GROUPED_RESUME of OLLAMA_NUM_CTX
+        """
+        fits = (settings.OLLAMA_NUM_CTX - BATCH_INSTRUCTION_TOKENS) // MIN_TOKENS_PER_GROUPED_RESUME
+        return max(1, min(requested, fits))
+    
+    def _truncate(self, text: str, max_tokens: int = settings.MAX_TOKENS) -> str:
+        """
+        Truncate resume text to fit the LLM context
+        """
+        max_chars = max_tokens * 4  # Rough estimate: 1 token ≈ 4 chars
         if len(text) > max_chars:
             text = text[:max_chars] + "...[truncated]"
-        
-        # Format prompt with resume text
-        from app.utils.prompts import get_prompt
-        prompt = get_prompt("main_parser", resume_text=text)
+        return text
+    
+    async def _parse_with_llm(self, text: str) -> Dict:
+        """
+        Use LLM to parse resume text into structured format
+        """
+        # Truncate text if too long, then format prompt with resume text
+        text = self._truncate(text)
+        prompt = build_main_prompt(text)
         
         # Generate structured data
         try:
+            # The schema makes decoding grammar-constrained, and the JSON is
+            # roughly proportional to the resume, so cap generation to match
             parsed_data = await self.ollama_service.generate_json(
                 prompt=prompt,
-                retry_attempts=settings.RETRY_ATTEMPTS
+                retry_attempts=settings.RETRY_ATTEMPTS,
+                schema=RESUME_SCHEMA,
+                num_predict=min(4096, 512 + len(text) // 3)
             )
             
             return parsed_data
@@ -61,12 +230,12 @@ class ResumeParser:
         except Exception as e:
             raise Exception(f"Failed to parse resume with LLM: {str(e)}")
     
-    def _post_process(self, data: Dict) -> Dict:
+    def _post_process(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Post-process parsed data for consistency and completeness
         """
         # Ensure all required sections exist
-        default_structure = {
+        default_structure: Dict[str, Any] = {
             "personal_info": {
                 "name": None,
                 "email": None,
@@ -101,59 +270,52 @@ class ResumeParser:
                         data[key][sub_key] = sub_default
         
         # Clean and normalize data
-        data = self._normalize_dates(data)
-        data = self._clean_empty_values(data)
-        
-        return data
+        return self._clean_empty_values(data)
     
-    def _normalize_dates(self, data: Dict) -> Dict:
+    def _format_date(self, date_str: Any) -> str:
         """
-        Normalize date formats across the resume
+        Format date string to consistent format
         """
-        # Normalize experience dates
-        if "experience" in data and isinstance(data["experience"], list):
-            for exp in data["experience"]:
-                if isinstance(exp, dict):
-                    exp["start_date"] = self._format_date(exp.get("start_date"))
-                    exp["end_date"] = self._format_date(exp.get("end_date"))
+        if not date_str:
+            return "Present"
         
-        # Normalize education dates
-        if "education" in data and isinstance(data["education"], list):
-            for edu in data["education"]:
-                if isinstance(edu, dict):
-                    edu["start_date"] = self._format_date(edu.get("start_date"))
-                    edu["end_date"] = self._format_date(edu.get("end_date"))
+        # Keep original format for now - could add more sophisticated parsing
+        date_str = str(date_str).strip()
+        if date_str.lower() in PRESENT_DATES:
+            return "Present"
         
-        return data
+        return date_str
     
-    def _format_date(self, date_str):
+    def _clean_empty_values(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Format date string to consistent format
+        Clean empty or null values from parsed data, in place
+        
+        Experience and education dates are normalized during the same walk,
+        so the tree is traversed once with an explicit stack and no copy.
         """
-        if not date_str or date_str in ["Present", "Current", "Now"]:
-            return "Present"
+        # (container, whether its entries carry start/end dates)
+        stack: List[Tuple[Union[Dict[str, Any], List[Any]], bool]] = [(data, False)]
         
-        # Keep original format for now - could add more sophisticated parsing
-        return str(date_str).strip()
-    
-    def _clean_empty_values(self, data: Dict) -> Dict:
-        """
-        Clean empty or null values from parsed data
-        """
-        if isinstance(data, dict):
-            return {
-                k: self._clean_empty_values(v) 
-                for k, v in data.items() 
-                if v is not None and v != "" and v != []
-            }
-        elif isinstance(data, list):
-            return [
-                self._clean_empty_values(item) 
-                for item in data 
-                if item is not None and item != "" and item != {}
-            ]
-        else:
-            return data
+        while stack:
+            node, has_dates = stack.pop()
+            
+            if isinstance(node, dict):
+                for key, value in list(node.items()):
+                    if value is None or value == "" or value == []:
+                        del node[key]
+                    elif isinstance(value, (dict, list)):
+                        stack.append((value, node is data and key in ("experience", "education")))
+            else:
+                if has_dates:
+                    for entry in node:
+                        if isinstance(entry, dict):
+                            entry["start_date"] = self._format_date(entry.get("start_date"))
+                            entry["end_date"] = self._format_date(entry.get("end_date"))
+                
+                node[:] = [item for item in node if item is not None and item != "" and item != {}]
+                stack.extend((item, False) for item in node if isinstance(item, (dict, list)))
+        
+        return data
     
     async def extract_specific_section(self, text: str, section: str) -> Dict:
         """
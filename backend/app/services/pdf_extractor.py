@@ -1,33 +1,138 @@
 """
 PDF Text Extraction Service
 """
-import pdfplumber
-import PyPDF2
+import pypdfium2 as pdfium
+import asyncio
+import io
+import os
 import re
-from typing import Optional
-import fitz  # PyMuPDF
-import pytesseract
-from pdf2image import convert_from_path
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
+from app.config import settings
+
+# PyMuPDF, pytesseract and pdf2image (with PIL) are imported where they are
+# used, so API workers that never probe a PDF or fall back to OCR don't pay
+# their import time and memory
+
+# Keep each tesseract process single-threaded; OCR parallelism comes from
+# running several processes side by side instead
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+# A PDF file path, or the raw bytes of an upload held in memory
+PDFSource = Union[str, bytes]
+
+# Backends whose pages can be extracted independently in pool workers
+PAGE_PARALLEL_METHODS = ("pypdfium2", "pymupdf")
+
+# Upper bound on pages per worker task; each task reopens the document
+MAX_PAGES_PER_TASK = 5
+
+# PDFs whose page count/metadata are remembered by _describe
+INFO_CACHE_SIZE = 64
+
+# A first page with less text than this is treated as a scan and sent to OCR
+SCANNED_TEXT_THRESHOLD = 20
+
+# 200 DPI is plenty for resume-sized body text and halves the pixels of 300;
+# LSTM engine only, pages treated as one uniform block of text
+OCR_DPI = 200
+OCR_CONFIG = "--oem 1 --psm 6"
+
+# PDFium is not thread-safe, not even across separate documents, so every
+# in-process pypdfium2 call goes through this lock (pool workers are separate
+# processes with their own PDFium and must not take it: a forked child could
+# inherit it held and block forever)
+_PDFIUM_LOCK = threading.Lock()
+
+# _clean_text patterns, compiled once
+_RE_WS = re.compile(r'\s+')
+_RE_NL = re.compile(r'\n{3,}')
+
+# One translate pass deletes control characters that might interfere with
+# parsing (\x00-\x08, \x0b-\x0c, \x0e-\x1f, \x7f-\x9f) and maps \r to \n
+_CLEAN_TABLE = dict.fromkeys(
+    list(range(0x00, 0x09)) + [0x0b, 0x0c] + list(range(0x0e, 0x20)) + list(range(0x7f, 0xa0))
+)
+_CLEAN_TABLE[ord('\r')] = '\n'
+
+
+def _extract_page_texts(pdf_path: PDFSource, page_indices: List[int], method: str = "pypdfium2") -> List[str]:
+    """
+    Extract the text of the given pages with pypdfium2 or PyMuPDF
+    
+    Module-level so it can run in a ProcessPoolExecutor worker; it takes no
+    _PDFIUM_LOCK, so it must not be called from threads of the API process.
+    """
+    if method == "pymupdf":
+        import fitz  # PyMuPDF
+        
+        if isinstance(pdf_path, bytes):
+            doc = fitz.open(stream=pdf_path, filetype="pdf")
+        else:
+            doc = fitz.open(pdf_path)
+        try:
+            return [doc.load_page(idx).get_text("text") for idx in page_indices]
+        finally:
+            doc.close()
+    
+    pdf = pdfium.PdfDocument(pdf_path)
+    try:
+        return [pdf[idx].get_textpage().get_text_range() for idx in page_indices]
+    finally:
+        pdf.close()
+
 
 class PDFExtractor:
     """
     Extract text from PDF files using multiple methods
     """
     
-    def __init__(self):
-        self.method = "pdfplumber"  # Default method
+    def __init__(self, executor: Optional[Executor] = None):
+        # Process pool for spreading the pages of one PDF across cores
+        self.executor = executor
+        self._info_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+        self.method = settings.PDF_EXTRACTION_METHOD
+        self._extractors = {
+            "pypdfium2": self._extract_with_pypdfium2,
+            "pymupdf": self._extract_with_pymupdf,
+            "pdfplumber": self._extract_with_pdfplumber,
+        }
     
-    def extract_text(self, pdf_path: str) -> str:
+    def extract_text(self, pdf_path: PDFSource) -> str:
         """
-        Extract text from PDF file
+        Extract text from PDF file (a path or the file's bytes)
+        """
+        # Only worth a probe when a scan would be sent to OCR
+        scanned = settings.USE_OCR_FALLBACK and self._probe(pdf_path)[1]
+        return self._extract_text(pdf_path, scanned)
+    
+    def _extract_text(self, pdf_path: PDFSource, scanned: bool) -> str:
+        """
+        extract_text for a PDF already probed (scanned: _probe's verdict)
         """
         try:
-            # Try primary method (pdfplumber)
-            text = self._extract_with_pdfplumber(pdf_path)
+            # Scanned PDFs go straight to OCR instead of through every text parser;
+            # if OCR fails (tesseract/poppler missing) or finds nothing, e.g. an
+            # image cover over text pages, the text extractors still get a try
+            if scanned:
+                try:
+                    text = self._clean_text(self._extract_with_ocr(pdf_path))
+                except Exception:
+                    text = ""
+                if text:
+                    return text
+            
+            # Try primary method (configured backend, pypdfium2 by default)
+            extractor = self._extractors.get(self.method, self._extract_with_pypdfium2)
+            text = extractor(pdf_path)
             
             # If extraction yields poor results, try fallback
             if not text or len(text.strip()) < 50:
-                text = self._extract_with_pypdf2(pdf_path)
+                text = self._extract_fallback(pdf_path)
             
             # Clean and normalize text
             text = self._clean_text(text)
@@ -36,53 +141,228 @@ class PDFExtractor:
         
         except Exception as e:
             raise Exception(f"Failed to extract text from PDF: {str(e)}")
+    
+    async def extract_text_async(self, pdf_path: PDFSource) -> str:
+        """
+        Extract text from PDF without blocking the event loop
         
+        With a process pool and a page-parallel backend, the pages of a
+        multi-page PDF are split into blocks and extracted in parallel;
+        otherwise the whole file is handled by extract_text in a thread.
+        """
+        if self.executor is None or self.method not in PAGE_PARALLEL_METHODS:
+            return await asyncio.to_thread(self.extract_text, pdf_path)
         
-
-    # def _extract_with_pymupdf(self, pdf_path: str) -> str:
-    #     text = ""
-    #     doc = fitz.open(pdf_path)
-    #     for page in doc:
-    #         text += page.get_text("text") + "\n\n"
-    #     doc.close()
-    #     return text
+        try:
+            page_count, scanned = await asyncio.to_thread(self._probe, pdf_path)
+            
+            if scanned or page_count < 2:
+                return await asyncio.to_thread(self._extract_text, pdf_path, scanned)
+            
+            # Spread pages over the workers, but in blocks so long documents
+            # don't pay a reopen (and a pickled copy of the bytes) per page
+            workers = os.cpu_count() or 1
+            block = min(MAX_PAGES_PER_TASK, -(-page_count // workers))
+            
+            loop = asyncio.get_running_loop()
+            blocks = await asyncio.gather(*[
+                loop.run_in_executor(
+                    self.executor, _extract_page_texts, pdf_path,
+                    list(range(start, min(start + block, page_count))), self.method
+                )
+                for start in range(0, page_count, block)
+            ])
+            text = "\n\n".join(page for pages in blocks for page in pages if page)
+            
+            # If extraction yields poor results, try fallback
+            if not text or len(text.strip()) < 50:
+                text = await asyncio.to_thread(self._extract_fallback, pdf_path)
+            
+            return self._clean_text(text)
+        
+        except Exception as e:
+            raise Exception(f"Failed to extract text from PDF: {str(e)}")
     
-    def _extract_with_pdfplumber(self, pdf_path: str) -> str:
+    def _probe(self, pdf_path: PDFSource) -> Tuple[int, bool]:
         """
-        Extract text using pdfplumber (best for complex layouts)
+        Get the page count, and whether the PDF looks scanned
+        
+        The document is opened with the primary backend (PyMuPDF if configured,
+        PDFium otherwise) and only the first page's text layer is inspected, so
+        this is cheap next to a full extraction pass; scans are only flagged
+        when OCR is enabled. A file the probe can't open counts as 0 pages, not
+        scanned, and is left to the extractors and their fallbacks.
+        """
+        first = None
+        try:
+            if self.method == "pymupdf":
+                doc = self._open_fitz(pdf_path)
+                try:
+                    page_count = doc.page_count
+                    if page_count and settings.USE_OCR_FALLBACK:
+                        first = doc.load_page(0).get_text("text")
+                finally:
+                    doc.close()
+            else:
+                with _PDFIUM_LOCK:
+                    pdf = pdfium.PdfDocument(pdf_path)
+                    try:
+                        page_count = len(pdf)
+                        if page_count and settings.USE_OCR_FALLBACK:
+                            first = pdf[0].get_textpage().get_text_range()
+                    finally:
+                        pdf.close()
+        except Exception:
+            return 0, False
+        
+        return page_count, first is not None and len(first.strip()) < SCANNED_TEXT_THRESHOLD
+    
+    def _extract_fallback(self, pdf_path: PDFSource) -> str:
         """
+        Fallback chain for PDFs the primary backend got little text from
+        
+        The C engines (PDFium, MuPDF) are tried first; the layout-aware but
+        pure-Python, slow pdfplumber is only the last resort.
+        """
+        primary = self._extractors.get(self.method)
         text = ""
         
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n\n"
+        for extractor in (self._extract_with_pypdfium2, self._extract_with_pymupdf, self._extract_with_pdfplumber):
+            if extractor == primary:
+                continue
+            try:
+                text = extractor(pdf_path)
+            except Exception:
+                continue
+            if text and len(text.strip()) >= 50:
+                break
         
         return text
     
-    def _extract_with_pypdf2(self, pdf_path: str) -> str:
+    def _open_fitz(self, pdf_path: PDFSource):
         """
-        Extract text using PyPDF2 (fallback method)
+        Open a PDF path or in-memory bytes with PyMuPDF
         """
-        text = ""
+        import fitz  # PyMuPDF
         
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            for page in pdf_reader.pages:
+        if isinstance(pdf_path, bytes):
+            return fitz.open(stream=pdf_path, filetype="pdf")
+        return fitz.open(pdf_path)
+    
+    def _extract_with_pymupdf(self, pdf_path: PDFSource) -> str:
+        """
+        Extract text using PyMuPDF (MuPDF C engine)
+        """
+        doc = self._open_fitz(pdf_path)
+        try:
+            return "\n\n".join(page.get_text("text") for page in doc)
+        finally:
+            doc.close()
+    
+    def _stream(self, pdf_path: PDFSource):
+        """
+        Path or file-like object for libraries that accept either
+        """
+        return io.BytesIO(pdf_path) if isinstance(pdf_path, bytes) else pdf_path
+    
+    def _extract_with_pypdfium2(self, pdf_path: PDFSource) -> str:
+        """
+        Extract text using pypdfium2 (PDFium C engine, fastest)
+        """
+        parts = []
+        
+        with _PDFIUM_LOCK:
+            pdf = pdfium.PdfDocument(pdf_path)
+            try:
+                for page in pdf:
+                    page_text = page.get_textpage().get_text_range()
+                    if page_text:
+                        parts.append(page_text)
+            finally:
+                pdf.close()
+        
+        return "\n\n".join(parts)
+    
+    def _extract_with_pdfplumber(self, pdf_path: PDFSource) -> str:
+        """
+        Extract text using pdfplumber (best for complex layouts)
+        """
+        # Imported lazily: pdfplumber/pdfminer are slow to import and only
+        # needed when this backend is configured or reached as a fallback
+        import pdfplumber
+        
+        parts = []
+        
+        with pdfplumber.open(self._stream(pdf_path)) as pdf:
+            for page in pdf.pages:
                 page_text = page.extract_text()
                 if page_text:
-                    text += page_text + "\n\n"
+                    parts.append(page_text)
         
-        return text
+        return "\n\n".join(parts)
     
-    def _extract_with_ocr(self, pdf_path: str) -> str:
-        images = convert_from_path(pdf_path)
-        text = ""
-        for image in images:
-            text += pytesseract.image_to_string(image) + "\n\n"
-        return text
+    def _extract_with_ocr(self, pdf_path: PDFSource) -> str:
+        """
+        Extract text with tesseract, OCRing batches of pages concurrently
+        
+        Pages are split into one contiguous batch per core and each batch is a
+        single tesseract subprocess, so threads are enough to keep them running
+        side by side.
+        """
+        from pdf2image import convert_from_bytes, convert_from_path
+        
+        # Render straight to grayscale: tesseract binarizes internally, and a
+        # single channel is a third of the pixels to convert and hand over
+        if isinstance(pdf_path, bytes):
+            images = convert_from_bytes(pdf_path, dpi=OCR_DPI, grayscale=True)
+        else:
+            images = convert_from_path(pdf_path, dpi=OCR_DPI, grayscale=True)
+        
+        if not images:
+            return ""
+        
+        workers = min(len(images), os.cpu_count() or 1)
+        size = -(-len(images) // workers)
+        batches = [images[start:start + size] for start in range(0, len(images), size)]
+        
+        with tempfile.TemporaryDirectory() as workdir:
+            if len(batches) == 1:
+                return self._ocr_batch(batches[0], workdir, 0)
+            
+            with ThreadPoolExecutor(max_workers=len(batches)) as pool:
+                return "\n\n".join(pool.map(
+                    self._ocr_batch, batches, [workdir] * len(batches), range(len(batches))
+                ))
+    
+    def _ocr_batch(self, images: list, workdir: str, batch: int) -> str:
+        """
+        OCR page images with a single tesseract process
+        
+        tesseract accepts a text file listing images, so the language data is
+        loaded once for the whole batch rather than once per page.
+        """
+        import pytesseract
+        
+        paths = []
+        for idx, image in enumerate(images):
+            path = os.path.join(workdir, f"page_{batch}_{idx}.png")
+            image.save(path)
+            paths.append(path)
+        
+        list_path = os.path.join(workdir, f"files_{batch}.txt")
+        with open(list_path, "w") as f:
+            f.write("\n".join(paths) + "\n")
+        
+        result = subprocess.run(
+            [pytesseract.pytesseract.tesseract_cmd, list_path, "stdout",
+             "-l", settings.OCR_LANGUAGE, *OCR_CONFIG.split()],
+            capture_output=True
+        )
+        if result.returncode != 0:
+            raise Exception(f"tesseract failed: {result.stderr.decode(errors='replace').strip()}")
+        
+        # tesseract separates the pages of a multi-image run with form feeds
+        return result.stdout.decode("utf-8", errors="replace").replace("\f", "\n\n")
     
     def _clean_text(self, text: str) -> str:
         """
@@ -92,16 +372,15 @@ class PDFExtractor:
             return ""
         
         # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove special characters that might interfere with parsing
-        text = re.sub(r'[\x00-\x08\x0b-\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+        text = _RE_WS.sub(' ', text)
         
-        # Normalize line breaks
-        text = text.replace('\r\n', '\n').replace('\r', '\n')
+        # Remove special characters that might interfere with parsing and
+        # normalize line breaks (whitespace runs are already collapsed, so no
+        # \r\n pairs remain)
+        text = text.translate(_CLEAN_TABLE)
         
         # Remove multiple consecutive newlines
-        text = re.sub(r'\n{3,}', '\n\n', text)
+        text = _RE_NL.sub('\n\n', text)
         
         # Trim whitespace
         text = text.strip()
@@ -112,31 +391,61 @@ class PDFExtractor:
         """
         Get number of pages in PDF
         """
-        try:
-            with pdfplumber.open(pdf_path) as pdf:
-                return len(pdf.pages)
-        except:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                return len(pdf_reader.pages)
+        return self._describe(pdf_path)["pages"]
     
     def extract_metadata(self, pdf_path: str) -> dict:
         """
         Extract PDF metadata
         """
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                metadata = pdf_reader.metadata
-                
-                return {
-                    "title": metadata.get("/Title", ""),
-                    "author": metadata.get("/Author", ""),
-                    "subject": metadata.get("/Subject", ""),
-                    "creator": metadata.get("/Creator", ""),
-                    "producer": metadata.get("/Producer", ""),
-                    "creation_date": metadata.get("/CreationDate", ""),
-                    "pages": len(pdf_reader.pages)
-                }
+            return dict(self._describe(pdf_path))
         except Exception as e:
-            return {"error": str(e)}
\ No newline at end of file
+            return {"error": str(e)}
+    
+    def _describe(self, pdf_path: str) -> dict:
+        """
+        Page count and metadata from a single open, cached per (path, mtime)
+        """
+        key = (pdf_path, os.stat(pdf_path).st_mtime_ns)
+        info = self._info_cache.get(key)
+        if info is not None:
+            self._info_cache.move_to_end(key)
+            return info
+        
+        try:
+            doc = self._open_fitz(pdf_path)
+            try:
+                metadata = doc.metadata or {}
+                info = {
+                    "title": metadata.get("title", ""),
+                    "author": metadata.get("author", ""),
+                    "subject": metadata.get("subject", ""),
+                    "creator": metadata.get("creator", ""),
+                    "producer": metadata.get("producer", ""),
+                    "creation_date": metadata.get("creationDate", ""),
+                    "pages": doc.page_count
+                }
+            finally:
+                doc.close()
+        except Exception:
+            with _PDFIUM_LOCK:
+                pdf = pdfium.PdfDocument(pdf_path)
+                try:
+                    metadata = pdf.get_metadata_dict()
+                    info = {
+                        "title": metadata.get("Title", ""),
+                        "author": metadata.get("Author", ""),
+                        "subject": metadata.get("Subject", ""),
+                        "creator": metadata.get("Creator", ""),
+                        "producer": metadata.get("Producer", ""),
+                        "creation_date": metadata.get("CreationDate", ""),
+                        "pages": len(pdf)
+                    }
+                finally:
+                    pdf.close()
+        
+        self._info_cache[key] = info
+        if len(self._info_cache) > INFO_CACHE_SIZE:
+            self._info_cache.popitem(last=False)
+        
+        return info
@@ -2,12 +2,140 @@
 Resume Analyzer Service - Analyzes parsed resumes using Ollama
 """
 import asyncio
-from typing import Dict, List
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from dateutil import parser as date_parser
 from app.services.ollama_service import OllamaService
-from app.utils.prompts import get_analysis_prompt, get_system_prompt
+from app.utils.prompts import (
+    get_analysis_prompt,
+    get_fused_analysis_prompt,
+    get_system_prompt,
+    serialize_resume,
+)
+from app.utils.validators import PRESENT_DATES
 from app.config import settings
 
 
+logger = logging.getLogger(__name__)
+
+
+# Jobs shorter than this count as short stints / risk flags
+SHORT_JOB_MONTHS = 18
+
+
+def _items(resume: Dict, key: str) -> List:
+    """
+    List-valued section of a parsed resume ([] when missing or malformed)
+    """
+    value = resume.get(key)
+    return value if isinstance(value, list) else []
+
+
+def _months_between(start: Any, end: Any) -> int:
+    """
+    Months between two resume date strings; an unparseable range counts as a year
+    """
+    try:
+        start_date = date_parser.parse(str(start), fuzzy=True)
+        
+        if not end or str(end).strip().lower() in PRESENT_DATES:
+            end_date = datetime.now()
+        else:
+            end_date = date_parser.parse(str(end), fuzzy=True)
+        
+        months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
+        return max(0, months)
+    except (ValueError, OverflowError):
+        return 12
+
+
+def _job_months(resume: Dict) -> List[int]:
+    return [
+        _months_between(job.get("start_date"), job.get("end_date"))
+        for job in _items(resume, "experience") if isinstance(job, dict)
+    ]
+
+
+# The categories below are fixed formulas over counts and date ranges (see
+# ANALYSIS_PROMPTS); computing them here gives the same answer without an LLM call
+
+def _score_stability(resume: Dict) -> Dict:
+    months = _job_months(resume)
+    short_stints = sum(1 for m in months if m < SHORT_JOB_MONTHS)
+    avg_tenure = sum(months) / len(months) / 12 if months else 0.0
+    
+    score = 100 - short_stints * 15
+    if avg_tenure < 1:
+        score -= 30
+    if avg_tenure < 2:
+        score -= 20
+    
+    return {
+        "score": max(0, score),
+        "avg_tenure_years": round(avg_tenure, 1),
+        "short_stints": short_stints,
+        "total_jobs": len(months)
+    }
+
+
+def _score_skills(resume: Dict) -> Dict:
+    skills = resume.get("skills")
+    if not isinstance(skills, dict):
+        skills = {}
+    technical = len(_items(skills, "technical"))
+    tools = len(_items(skills, "tools"))
+    total = technical + tools
+    
+    score = total * 6
+    if total >= 10:
+        score += 20
+    if total >= 15:
+        score += 20
+    
+    return {
+        "score": min(100, score),
+        "total_skills": total,
+        "technical": technical,
+        "tools": tools
+    }
+
+
+def _score_quality(resume: Dict) -> Dict:
+    skills = resume.get("skills")
+    sections_present = sum((
+        bool(resume.get("personal_info")),
+        bool(_items(resume, "experience")),
+        bool(_items(resume, "education")),
+        isinstance(skills, dict) and any(skills.values()),
+    ))
+    
+    return {
+        "score": sections_present * 25,
+        "sections_present": sections_present,
+        "total_sections_checked": 4
+    }
+
+
+def _score_risk(resume: Dict) -> Dict:
+    months = _job_months(resume)
+    short_jobs = sum(1 for m in months if m < SHORT_JOB_MONTHS)
+    
+    return {
+        "score": max(0, 100 - short_jobs * 20),
+        "short_jobs": short_jobs,
+        "total_jobs": len(months)
+    }
+
+
+_LOCAL_SCORERS = {
+    "career_stability": _score_stability,
+    "skills_competency": _score_skills,
+    "resume_quality": _score_quality,
+    "risk_indicators": _score_risk,
+}
+
+
 class ResumeAnalyzer:
     """
     Analyzes parsed resume data across 8 key parameters
@@ -16,6 +144,10 @@ class ResumeAnalyzer:
     def __init__(self, ollama_service: OllamaService):
         self.ollama = ollama_service
         
+        # Ollama serves only a few generations per model at once; beyond that
+        # requests just queue server-side and contend for the KV cache
+        self._sem = asyncio.Semaphore(settings.OLLAMA_PARALLEL)
+        
         # Analysis categories
         self.categories = [
             "career_stability",
@@ -39,6 +171,7 @@ class ResumeAnalyzer:
             "cultural_fit": 0.10,          # 10%
             "risk_indicators": 0.05        # 5%
         }
+        self._weight_items = tuple(self.weights.items())
     
     async def analyze(self, parsed_resume: Dict) -> Dict:
         """
@@ -50,30 +183,43 @@ class ResumeAnalyzer:
         Returns:
             Analysis results with scores and explanations
         """
-        print("Starting resume analysis across 8 parameters...")
+        logger.info("Starting resume analysis across 8 parameters...")
         
         try:
-            # Run all analyses in parallel for speed
+            # Serialize once; every LLM category prompt embeds the same JSON
+            resume_json = serialize_resume(parsed_resume)
+            
+            # The LLM categories share one fused call, so the resume is
+            # prefilled once rather than once per category
+            fused = await self._analyze_fused(
+                [category for category in self.categories if category not in _LOCAL_SCORERS],
+                resume_json
+            )
+            
+            # Local scores, and anything the fused reply missed, in parallel
+            pending = [category for category in self.categories if category not in fused]
             tasks = [
-                self._analyze_category(category, parsed_resume)
-                for category in self.categories
+                self._analyze_category(category, parsed_resume, resume_json)
+                for category in pending
             ]
             
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            results = dict(zip(pending, await asyncio.gather(*tasks, return_exceptions=True)))
+            results.update(fused)
             
             # Build analysis object
             analysis = {}
-            for i, category in enumerate(self.categories):
-                if isinstance(results[i], Exception):
-                    print(f"Error analyzing {category}: {str(results[i])}")
+            for category in self.categories:
+                result = results[category]
+                if isinstance(result, Exception):
+                    logger.error("Error analyzing %s: %s", category, result)
                     # Provide default score on error
                     analysis[category] = {
                         "score": 50,
-                        "error": str(results[i]),
+                        "error": str(result),
                         "explanation": f"Analysis failed for {category}"
                     }
                 else:
-                    analysis[category] = results[i]
+                    analysis[category] = result
             
             # Calculate overall score
             overall_score = self._calculate_overall_score(analysis)
@@ -86,50 +232,119 @@ class ResumeAnalyzer:
                 "weights_used": self.weights
             }
             
-            print(f"Analysis complete. Overall score: {overall_score}/100")
+            logger.info("Analysis complete. Overall score: %d/100", overall_score)
             
             return analysis
         
         except Exception as e:
-            print(f"Critical error during analysis: {str(e)}")
+            logger.error("Critical error during analysis: %s", e)
             raise Exception(f"Resume analysis failed: {str(e)}")
     
-    async def _analyze_category(self, category: str, resume_data: Dict) -> Dict:
+    async def _analyze_category(
+        self,
+        category: str,
+        resume_data: Dict,
+        resume_json: Optional[str] = None
+    ) -> Dict:
         """
         Analyze a single category
         
+        Deterministic categories are scored locally; the rest go to Ollama.
+        
         Args:
             category: Analysis category name
             resume_data: Parsed resume data
+            resume_json: resume_data already serialized for prompts (optional)
         
         Returns:
             Analysis result for this category
         """
         try:
-            print(f"Analyzing: {category}...")
-            
-            # Get the appropriate prompt
-            prompt = get_analysis_prompt(category, resume_data)
+            logger.debug("Analyzing: %s...", category)
             
-            # Call Ollama with analyzer system prompt
-            result = await self.ollama.generate_json(
-                prompt=prompt,
-                system_prompt=get_system_prompt("analyzer"),
-                retry_attempts=2
-            )
+            scorer = _LOCAL_SCORERS.get(category)
+            if scorer:
+                result = scorer(resume_data)
+            else:
+                # Get the appropriate prompt
+                prompt = get_analysis_prompt(category, resume_json or resume_data)
+                
+                # Call Ollama with analyzer system prompt
+                async with self._sem:
+                    result = await self.ollama.generate_json(
+                        prompt=prompt,
+                        system_prompt=get_system_prompt("analyzer"),
+                        retry_attempts=2
+                    )
             
             # Validate score is in range
             if "score" in result:
                 result["score"] = max(0, min(100, result["score"]))
             
-            print(f"✓ {category}: {result.get('score', 'N/A')}/100")
+            logger.debug("✓ %s: %s/100", category, result.get('score', 'N/A'))
             
             return result
         
         except Exception as e:
-            print(f"✗ {category}: Failed - {str(e)}")
+            logger.warning("✗ %s: Failed - %s", category, e)
             raise Exception(f"Failed to analyze {category}: {str(e)}")
     
+    async def _analyze_fused(self, categories: List[str], resume_json: str) -> Dict[str, Dict]:
+        """
+        Analyze several LLM categories with a single Ollama call
+        
+        Args:
+            categories: Category names to answer together
+            resume_json: Serialized parsed resume data
+        
+        Returns:
+            Results for the categories the reply covered (possibly none);
+            the caller analyzes the rest one by one
+        """
+        if len(categories) < 2:
+            return {}
+        
+        try:
+            async with self._sem:
+                reply = await self.ollama.generate_json(
+                    prompt=get_fused_analysis_prompt(categories, resume_json),
+                    system_prompt=get_system_prompt("analyzer"),
+                    retry_attempts=2,
+                    schema={
+                        "type": "object",
+                        "properties": {
+                            category: {
+                                "type": "object",
+                                "properties": {"score": {"type": "number"}},
+                                "required": ["score"]
+                            }
+                            for category in categories
+                        },
+                        "required": categories
+                    }
+                )
+        except Exception as e:
+            logger.warning("✗ Fused analysis failed, analyzing separately - %s", e)
+            return {}
+        
+        if not isinstance(reply, dict):
+            return {}
+        
+        results = {}
+        for category in categories:
+            result = reply.get(category)
+            # An entry without a numeric score is left out and re-asked on its own
+            if not isinstance(result, dict):
+                continue
+            score = result.get("score")
+            if not isinstance(score, (int, float)) or isinstance(score, bool):
+                continue
+            result["score"] = max(0, min(100, score))
+            logger.debug("✓ %s: %s/100", category, result.get('score', 'N/A'))
+            results[category] = result
+        
+        return results
+    
     def _calculate_overall_score(self, analysis: Dict) -> int:
         """
         Calculate weighted overall score
@@ -140,14 +355,13 @@ class ResumeAnalyzer:
         Returns:
             Weighted overall score (0-100)
         """
-        total_score = 0
-        total_weight = 0
-        
-        for category, weight in self.weights.items():
-            if category in analysis and "score" in analysis[category]:
-                score = analysis[category]["score"]
-                total_score += score * weight
-                total_weight += weight
+        scored = [
+            (analysis[category]["score"], weight)
+            for category, weight in self._weight_items
+            if category in analysis and "score" in analysis[category]
+        ]
+        total_score = sum(score * weight for score, weight in scored)
+        total_weight = sum(weight for _, weight in scored)
         
         if total_weight > 0:
             overall = total_score / total_weight
@@ -156,6 +370,18 @@ class ResumeAnalyzer:
         
         return round(overall)
     
+    def score_batch(self, analyses: List[Dict]) -> List[int]:
+        """
+        Calculate weighted overall scores for several analyses
+        
+        Args:
+            analyses: Analysis results, one dictionary per resume
+        
+        Returns:
+            Weighted overall scores (0-100), in the same order
+        """
+        return [self._calculate_overall_score(analysis) for analysis in analyses]
+    
     async def analyze_single_category(self, category: str, resume_data: Dict) -> Dict:
         """
         Analyze just one category (useful for testing)
@@ -197,7 +423,8 @@ class ResumeAnalyzer:
                 raise ValueError(f"Unknown category: {category}")
         
         self.weights.update(new_weights)
-        print(f"Updated weights: {self.weights}")
+        self._weight_items = tuple(self.weights.items())
+        logger.info("Updated weights: %s", self.weights)
 
 
 # Helper function to format analysis for display
@@ -1,6 +1,11 @@
 """
 Prompt templates for LLM-based resume parsing and analysis
 """
+import json
+from typing import Union
+
+# Bump whenever MAIN_PARSER_PROMPT changes so cached parses are invalidated
+PROMPT_VERSION = 1
 
 # Main resume parsing prompt
 MAIN_PARSER_PROMPT = """You are a resume parser. Parse this resume and output ONLY valid JSON.
@@ -31,6 +36,72 @@ CRITICAL RULES:
 JSON output:"""
 
 
+# Several resumes per request; the model returns one object per resume
+BATCH_PARSER_PROMPT = """You are a resume parser. Parse each of the {count} resumes below and output ONLY a valid JSON array with exactly {count} objects, one per resume, in the same order.
+
+{resumes}
+
+Each object must have this exact structure (fill with extracted data):
+{{
+  "personal_info": {{"name": "", "email": "", "phone": "", "location": "", "linkedin": "", "github": ""}},
+  "summary": "",
+  "experience": [{{"company": "", "position": "", "start_date": "", "end_date": "", "responsibilities": []}}],
+  "education": [{{"institution": "", "degree": "", "start_date": "", "end_date": "", "gpa": ""}}],
+  "skills": {{"technical": [], "soft_skills": [], "tools": []}},
+  "certifications": [{{"name": "", "issuer": "", "date": ""}}],
+  "projects": [{{"name": "", "description": "", "technologies": [], "link": ""}}],
+  "languages": [],
+  "achievements": []
+}}
+
+CRITICAL RULES:
+- Output ONLY the JSON array
+- NO explanations before or after
+- NO markdown code blocks
+- Never mix information from different resumes
+- Extract ALL information from each resume
+
+JSON output:"""
+
+
+def _string_fields(*names: str) -> dict:
+    return {name: {"type": "string"} for name in names}
+
+
+def _object(properties: dict) -> dict:
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+
+def _array(items: dict) -> dict:
+    return {"type": "array", "items": items}
+
+
+# JSON schema matching MAIN_PARSER_PROMPT's structure, for Ollama's `format`
+RESUME_SCHEMA = _object({
+    "personal_info": _object(_string_fields("name", "email", "phone", "location", "linkedin", "github")),
+    "summary": {"type": "string"},
+    "experience": _array(_object({
+        **_string_fields("company", "position", "start_date", "end_date"),
+        "responsibilities": _array({"type": "string"})
+    })),
+    "education": _array(_object(_string_fields("institution", "degree", "start_date", "end_date", "gpa"))),
+    "skills": _object({
+        "technical": _array({"type": "string"}),
+        "soft_skills": _array({"type": "string"}),
+        "tools": _array({"type": "string"})
+    }),
+    "certifications": _array(_object(_string_fields("name", "issuer", "date"))),
+    "projects": _array(_object({
+        **_string_fields("name", "description", "link"),
+        "technologies": _array({"type": "string"})
+    })),
+    "languages": _array({"type": "string"}),
+    "achievements": _array({"type": "string"})
+})
+
+RESUME_BATCH_SCHEMA = _array(RESUME_SCHEMA)
+
+
 # Resume Analysis Prompts
 ANALYSIS_PROMPTS = {
     "career_stability": """Calculate career stability score using this exact formula:
@@ -49,7 +120,7 @@ STEP 5: Calculate score:
    score = score - 20 if avg_tenure < 2 years
    score = max(0, score)
 
-Return ONLY this JSON (NO text, NO explanations):
+Output:
 {{
   "score": X,
   "avg_tenure_years": X.X,
@@ -72,7 +143,7 @@ STEP 5: Calculate:
    score = score + 15 per internal promotion
    score = score + 15 if current level >= 4
 
-Return ONLY this JSON:
+Output:
 {{
   "score": X,
   "progression": "upward/flat/downward",
@@ -94,7 +165,7 @@ STEP 4: Calculate:
    score = score + 20 if total >= 15
    score = min(100, score)
 
-Return ONLY this JSON:
+Output:
 {{
   "score": X,
   "total_skills": X,
@@ -116,7 +187,7 @@ STEP 2: Count sections present
 STEP 3: Calculate:
    score = sections_present * 25
 
-Return ONLY this JSON:
+Output:
 {{
   "score": X,
   "sections_present": X,
@@ -136,7 +207,7 @@ STEP 3: Calculate:
    score = score + (projects * 10)
    score = min(100, score)
 
-Return ONLY this JSON:
+Output:
 {{
   "score": X,
   "certifications": X,
@@ -155,7 +226,7 @@ STEP 4: Calculate:
    score = quantified_items * 15
    score = min(100, score)
 
-Return ONLY this JSON:
+Output:
 {{
   "score": X,
   "quantified_items": X,
@@ -174,7 +245,7 @@ STEP 3: Calculate:
    score = score + 40 if leadership_words found
    score = score + 20 per company (max 60)
 
-Return ONLY this JSON:
+Output:
 {{
   "score": X,
   "has_leadership": true/false,
@@ -193,7 +264,7 @@ STEP 3: Calculate:
    score = score - (short_jobs * 20)
    score = max(0, score)
 
-Return ONLY this JSON:
+Output:
 {{
   "score": X,
   "short_jobs": X,
@@ -203,11 +274,42 @@ Return ONLY this JSON:
 }
 
 
+# Several analysis categories answered in one reply over a single copy of the
+# resume; {sections} holds each category's steps and expected JSON
+FUSED_ANALYSIS_PROMPT = """Analyze this resume for each section below, applying each section's formula to the same resume data.
+
+Resume Data:
+{resume_json}
+
+{sections}
+
+Output: one object with keys {keys}, each holding its section's output."""
+
+
+# Each analysis prompt has a single {resume_json} hole, so like the main parser
+# prompt it is split once into unescaped halves and filled by concatenation
+ANALYSIS_PROMPT_PARTS = {
+    name: tuple(part.format() for part in template.split("{resume_json}", 1))
+    for name, template in ANALYSIS_PROMPTS.items()
+}
+
+
+def _analysis_section(analysis_type: str) -> str:
+    # The per-category prompt minus its resume block
+    intro, steps = ANALYSIS_PROMPT_PARTS[analysis_type]
+    intro = intro.replace("Resume Data:", "").strip()
+    steps = steps.replace("Output:", "Section output:")
+    return f"### {analysis_type}\n{intro}\n\n{steps.strip()}"
+
+
+ANALYSIS_SECTIONS = {name: _analysis_section(name) for name in ANALYSIS_PROMPTS}
+
+
 # System prompts for different models
 SYSTEM_PROMPTS = {
     "default": "You are a professional resume parser. Extract information accurately and return valid JSON only.",
     
-    "analyzer": "You are an expert HR analyst and resume evaluator. Provide objective, data-driven assessments with specific evidence. Always return valid JSON with numeric scores 0-100.",
+    "analyzer": "HR resume analyst. Numeric JSON scores 0-100.",
     
     "strict": "You are a JSON-only resume parser. You MUST return only valid JSON with no additional text, explanations, or markdown formatting."
 }
@@ -220,6 +322,42 @@ PROMPTS = {
 }
 
 
+# The main parser prompt has a single hole, so split it once at import time;
+# formatting the halves with no arguments just unescapes the {{ }} braces
+MAIN_PARSER_PREFIX, MAIN_PARSER_SUFFIX = (
+    part.format() for part in MAIN_PARSER_PROMPT.split("{resume_text}", 1)
+)
+
+
+def build_main_prompt(resume_text: str) -> str:
+    """
+    Build the main parser prompt for a resume without re-running str.format
+    
+    Args:
+        resume_text: Extracted resume text
+    
+    Returns:
+        Formatted prompt string
+    """
+    return MAIN_PARSER_PREFIX + resume_text + MAIN_PARSER_SUFFIX
+
+
+def build_batch_prompt(resume_texts: list) -> str:
+    """
+    Build a prompt asking for several resumes to be parsed in one reply
+    
+    Args:
+        resume_texts: Extracted resume texts, in the order results are wanted
+    
+    Returns:
+        Formatted prompt string
+    """
+    resumes = "\n\n".join(
+        f"Resume {idx}:\n{text}" for idx, text in enumerate(resume_texts, 1)
+    )
+    return BATCH_PARSER_PROMPT.format(count=len(resume_texts), resumes=resumes)
+
+
 def get_prompt(prompt_type: str, **kwargs) -> str:
     """
     Get a formatted prompt by type
@@ -242,13 +380,22 @@ def get_prompt(prompt_type: str, **kwargs) -> str:
         raise ValueError(f"Missing required variable for prompt: {e}")
 
 
-def get_analysis_prompt(analysis_type: str, resume_json: dict) -> str:
+def serialize_resume(resume_json: dict) -> str:
+    """
+    Serialize parsed resume data compactly for embedding in prompts
+    
+    No indentation or padding, since every whitespace token is prefill work.
+    """
+    return json.dumps(resume_json, separators=(',', ':'), ensure_ascii=False)
+
+
+def get_analysis_prompt(analysis_type: str, resume_json: Union[str, dict]) -> str:
     """
     Get a formatted analysis prompt
     
     Args:
         analysis_type: Type of analysis (career_stability, skills_competency, etc.)
-        resume_json: Parsed resume data
+        resume_json: Parsed resume data, or its serialize_resume() string
     
     Returns:
         Formatted prompt string
@@ -256,10 +403,37 @@ def get_analysis_prompt(analysis_type: str, resume_json: dict) -> str:
     if analysis_type not in ANALYSIS_PROMPTS:
         raise ValueError(f"Unknown analysis type: {analysis_type}")
     
-    import json
-    prompt_template = ANALYSIS_PROMPTS[analysis_type]
+    if not isinstance(resume_json, str):
+        resume_json = serialize_resume(resume_json)
+    
+    prefix, suffix = ANALYSIS_PROMPT_PARTS[analysis_type]
+    
+    return prefix + resume_json + suffix
+
+
+def get_fused_analysis_prompt(analysis_types: list, resume_json: Union[str, dict]) -> str:
+    """
+    Get one prompt covering several analysis categories
+    
+    Args:
+        analysis_types: Categories to answer, each a key of ANALYSIS_PROMPTS
+        resume_json: Parsed resume data, or its serialize_resume() string
+    
+    Returns:
+        Formatted prompt string
+    """
+    unknown = [name for name in analysis_types if name not in ANALYSIS_PROMPTS]
+    if unknown:
+        raise ValueError(f"Unknown analysis type: {unknown[0]}")
+    
+    if not isinstance(resume_json, str):
+        resume_json = serialize_resume(resume_json)
     
-    return prompt_template.format(resume_json=json.dumps(resume_json, indent=2))
+    return FUSED_ANALYSIS_PROMPT.format(
+        resume_json=resume_json,
+        sections="\n\n".join(ANALYSIS_SECTIONS[name] for name in analysis_types),
+        keys=", ".join(analysis_types)
+    )
 
 
 def get_system_prompt(style: str = "default") -> str:
@@ -1,17 +1,39 @@
 """
 Basic validation for parsed resume data
 """
+import re
 from datetime import datetime
+from app.config import settings
+
+
+# Compiled once at import. The patterns have no nested or overlapping
+# quantifiers, so matching stays linear even on hostile resume text.
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9-]{1,63}(?:\.[A-Za-z0-9-]{1,63}){1,8}")
+PHONE_RE = re.compile(r"\+?[0-9 ()./-]{7,25}")
+
+# Date values meaning "still ongoing" (compared lower-cased)
+PRESENT_DATES = frozenset({"", "present", "current", "now"})
 
 
 def validate_parsed_data(data: dict) -> dict:
     """
     Add basic validation metadata to parsed data
     """
+    warnings = []
+    personal_info = data.get('personal_info') or {}
+    
+    email = personal_info.get('email')
+    if settings.VALIDATE_EMAIL and email and not EMAIL_RE.fullmatch(str(email)):
+        warnings.append(f"Email looks invalid: {email}")
+    
+    phone = personal_info.get('phone')
+    if settings.VALIDATE_PHONE and phone and not PHONE_RE.fullmatch(str(phone)):
+        warnings.append(f"Phone number looks invalid: {phone}")
+    
     data['_validation'] = {
         'is_valid': True,
         'errors': [],
-        'warnings': [],
+        'warnings': warnings,
         'validated_at': datetime.now().isoformat()
     }
-    return data
\ No newline at end of file
+    return data
@@ -1,11 +1,68 @@
 # screening/agents/base_agent.py
 
+import contextlib
+import re
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
+from services.llm_cache import llm_cache
+from utils.json_extract import extract_json
 
-class BaseAgent(ABC):
-    """Abstract base class for all screening agents"""
+
+# (system_message, candidate_context, jd_context, instructions) for _build_prompt
+PromptSections = Tuple[str, str, str, str]
+
+# Reply shape spelled out for the model; the schema enforces it during decoding
+DEFAULT_FORMAT = """{
+  "score": <number 0-100>,
+  "reasoning": "<brief explanation>",
+  "strengths": ["<strength1>", ...],
+  "weaknesses": ["<weakness1>", ...],
+  "category_scores": {"<category>": <score>}
+}"""
+
+_SPACE_RUN_RE = re.compile(r"[ \t]{2,}")
+
+_NUMBER = {"type": "number"}
+_STRING = {"type": "string"}
+_STRING_LIST = {"type": "array", "items": _STRING}
+
+
+def object_schema(properties: Dict) -> Dict:
+    """JSON schema for an object with exactly these (all required) properties"""
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+
+# Reply shapes the agents ask for; passed to Ollama so decoding can't leave them
+SCORE_SCHEMA = object_schema({
+    "score": _NUMBER,
+    "reasoning": _STRING,
+    "strengths": _STRING_LIST,
+    "weaknesses": _STRING_LIST,
+    "category_scores": {"type": "object", "additionalProperties": _NUMBER}
+})
+
+ADJUSTMENT_SCHEMA = object_schema({
+    "adjustment": _NUMBER,
+    "final_score": _NUMBER,
+    "reasoning": _STRING,
+    "strengths": _STRING_LIST,
+    "weaknesses": _STRING_LIST,
+    "category_scores": {"type": "object", "additionalProperties": _NUMBER}
+})
+
+
+def compact_context(text: str) -> str:
+    """Drop blank lines and redundant spaces; every whitespace token is prefill work"""
+    lines = (_SPACE_RUN_RE.sub(" ", line.strip()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+class LLMAgent(ABC):
+    """Abstract base class for agents: the LLM client and the cached JSON round-trip"""
+    
+    # JSON schema the LLM reply is constrained to
+    response_schema: Dict = SCORE_SCHEMA
     
     def __init__(self, ollama_client):
         self.ollama_client = ollama_client
@@ -13,13 +70,14 @@ class BaseAgent(ABC):
         self.max_score = 100
     
     @abstractmethod
-    async def score(self, candidate: Dict, jd_requirements: Dict) -> Dict:
+    async def score(self, candidate: Dict, jd, facts: Optional[Dict] = None) -> Dict:
         """
         Score a candidate based on specific criteria
         
         Args:
             candidate: Parsed resume JSON
-            jd_requirements: Extracted job description requirements
+            jd: JDContext built from the extracted job description requirements
+            facts: get_factual_baseline() result for this pair, if already computed
             
         Returns:
             {
@@ -36,60 +94,148 @@ class BaseAgent(ABC):
         """Ensure score is within valid range"""
         return max(self.min_score, min(self.max_score, score))
     
-    def _build_prompt(self, system_message: str, candidate_context: str, jd_context: str, instructions: str) -> str:
-        """Build structured prompt for LLM"""
-        return f"""{system_message}
+    async def _query_json(
+        self,
+        prompt: str,
+        max_tokens: int = 2000,
+        schema: Optional[Dict] = None,
+        system: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        Query LLM and parse its JSON reply (cached per model + prompt); None if unparseable
+        
+        The reply is constrained to `schema`, or to this agent's response_schema.
+        """
+        cache_key = llm_cache.key(self.ollama_client.model, prompt, system or "")
+        cached = await llm_cache.aget(cache_key)
+        if cached is not None:
+            return cached
+        
+        response = await self._collect_json(prompt, max_tokens, schema or self.response_schema, system)
+        
+        result = extract_json(response)
+        if result is None:
+            return None
+        
+        # Only parsed replies are cached; an unparseable one gets another try
+        await llm_cache.aset(cache_key, result)
+        
+        return result
+    
+    async def _collect_json(self, prompt: str, max_tokens: int, schema: Dict, system: Optional[str] = None) -> str:
+        """
+        Stream the reply, stopping once the top-level JSON object closes
+        
+        Leaving the stream early closes the request, so Ollama doesn't keep
+        generating tokens after the object nobody will read.
+        """
+        parts = []
+        depth = 0
+        started = False
+        in_string = False
+        escaped = False
+        
+        # aclosing: a break must close the generator now, not at garbage collection,
+        # or it keeps holding the client's semaphore slot and connection
+        async with contextlib.aclosing(self.ollama_client.query_stream(
+            prompt, max_tokens=max_tokens, schema=schema, system=system
+        )) as stream:
+            async for chunk in stream:
+                parts.append(chunk)
+                
+                for ch in chunk:
+                    if in_string:
+                        if escaped:
+                            escaped = False
+                        elif ch == "\\":
+                            escaped = True
+                        elif ch == '"':
+                            in_string = False
+                    elif ch == '"':
+                        in_string = True
+                    elif ch == "{":
+                        depth += 1
+                        started = True
+                    elif ch == "}":
+                        depth -= 1
+                
+                if started and depth <= 0:
+                    break
+        
+        return "".join(parts)
+    
+    async def _query_llm(self, prompt: str, system: Optional[str] = None) -> Dict:
+        """Query LLM and parse response"""
+        result = await self._query_json(prompt, system=system)
+        
+        if result is None:
+            # Fallback structure; the schema keeps replies well-formed, but one
+            # cut off at the token limit (or an older Ollama) can still fail to parse
+            result = {
+                "score": 50,
+                "reasoning": "Unable to parse LLM response",
+                "strengths": [],
+                "weaknesses": [],
+                "category_scores": {}
+            }
+        
+        # Validate score
+        result["score"] = self._validate_score(result.get("score", 50))
+        
+        return result
 
-=== CANDIDATE INFORMATION ===
-{candidate_context}
 
-=== JOB REQUIREMENTS ===
-{jd_context}
+class BaseAgent(LLMAgent):
+    """
+    Abstract base class for the single-criterion screening agents
+    
+    Subclasses only build the prompt (prepare) and post-process the reply (finish).
+    """
+    
+    async def score(self, candidate: Dict, jd, facts: Optional[Dict] = None) -> Dict:
+        """prepare() -> one LLM call -> finish()"""
+        sections, state = self.prepare(candidate, jd, facts)
+        system, prompt = self._build_prompt(*sections)
+        llm_result = await self._query_llm(prompt, system)
+        return self.finish(llm_result, state)
+    
+    @abstractmethod
+    def prepare(self, candidate: Dict, jd, facts: Optional[Dict] = None) -> Tuple[PromptSections, Dict]:
+        """
+        Build the LLM prompt sections for a candidate
+        
+        Returns the sections plus whatever rule-based state finish() needs,
+        so callers such as CombinedAgent can issue the LLM call themselves.
+        """
+        pass
+    
+    def finish(self, llm_result: Dict, state: Dict) -> Dict:
+        """Turn the parsed LLM reply into this agent's final result"""
+        return llm_result
+    
+    def _build_prompt(self, system_message: str, candidate_context: str, jd_context: str, instructions: str) -> Tuple[str, str]:
+        """
+        Build structured (system, prompt) pair for LLM
+        
+        Everything shared by every candidate in a run (system message, job
+        requirements, reply format) goes in the system prompt, whose prefill
+        Ollama reuses between calls; the prompt holds only the per-candidate
+        instructions and data.
+        """
+        system = f"""{system_message.strip()}
 
-=== INSTRUCTIONS ===
-{instructions}
+=== JOB REQUIREMENTS ===
+{jd_context.strip()}
 
-Return your response as a valid JSON object with the following structure:
-{{
-  "score": <number 0-100>,
-  "reasoning": "<brief explanation>",
-  "strengths": ["<strength1>", "<strength2>", ...],
-  "weaknesses": ["<weakness1>", "<weakness2>", ...],
-  "category_scores": {{
-    "<category1>": <score>,
-    "<category2>": <score>
-  }}
-}}
+Unless the instructions give another format, reply with a JSON object:
+{DEFAULT_FORMAT}
 
 Do not include any text outside the JSON object."""
-    
-    async def _query_llm(self, prompt: str) -> Dict:
-        """Query LLM and parse response"""
-        import json
-        
-        response = await self.ollama_client.query(prompt)
-        
-        try:
-            result = json.loads(response)
-        except json.JSONDecodeError:
-            # Try to extract JSON from markdown
-            if "```json" in response:
-                json_str = response.split("```json")[1].split("```")[0].strip()
-                result = json.loads(json_str)
-            elif "```" in response:
-                json_str = response.split("```")[1].split("```")[0].strip()
-                result = json.loads(json_str)
-            else:
-                # Fallback structure
-                result = {
-                    "score": 50,
-                    "reasoning": "Unable to parse LLM response",
-                    "strengths": [],
-                    "weaknesses": [],
-                    "category_scores": {}
-                }
         
-        # Validate score
-        result["score"] = self._validate_score(result.get("score", 50))
+        prompt = f"""=== INSTRUCTIONS ===
+{instructions.strip()}
+
+=== CANDIDATE INFORMATION ===
+{compact_context(candidate_context)}"""
         
-        return result
\ No newline at end of file
+        return system, prompt
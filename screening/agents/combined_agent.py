@@ -0,0 +1,188 @@
+# screening/agents/combined_agent.py
+
+import asyncio
+from typing import Dict, List, Optional, Tuple
+from .base_agent import DEFAULT_FORMAT, LLMAgent, compact_context, object_schema
+from .skill_agent import SkillAgent
+from .experience_agent import ExperienceAgent
+from .fit_agent import FitAgent
+from parsers.jd_parser import JDContext
+from utils.factual_extraction import get_factual_baseline, get_factual_baselines
+
+
+class CombinedAgent(LLMAgent):
+    """
+    Runs the skill, experience and fit evaluations as one LLM request
+    
+    Each agent still builds its own prompt sections and post-processes its
+    own part of the reply; only the round-trip (and its prefill) is shared.
+    score_batch() goes further and packs several candidates into one request.
+    """
+    
+    def __init__(self, ollama_client):
+        super().__init__(ollama_client)
+        self.agents = {
+            "skill": SkillAgent(ollama_client),
+            "experience": ExperienceAgent(ollama_client),
+            "fit": FitAgent(ollama_client)
+        }
+        self.response_schema = object_schema({
+            name: agent.response_schema for name, agent in self.agents.items()
+        })
+    
+    async def score(self, candidate: Dict, jd: JDContext, facts: Optional[Dict] = None) -> Dict:
+        """
+        Score a candidate with all three agents in one request
+        
+        Returns:
+            {"skill": {...}, "experience": {...}, "fit": {...}}, each in the
+            shape the individual agent's score() returns
+        """
+        # Skill and experience agents share one factual baseline
+        if facts is None:
+            facts = get_factual_baseline(candidate, jd.requirements, jd.required_lower)
+        
+        prepared = self._prepare_all(candidate, jd, facts)
+        system, prompt = self._build_combined_prompt(
+            {name: sections for name, (sections, _) in prepared.items()}
+        )
+        
+        reply = await self._query_json(prompt, max_tokens=2000 * len(self.agents), system=system)
+        
+        return await self._finish_all(candidate, jd, facts, prepared, reply)
+    
+    async def score_batch(
+        self,
+        candidates: List[Dict],
+        jd: JDContext,
+        all_facts: Optional[List[Dict]] = None
+    ) -> List[Dict]:
+        """
+        Score several candidates in one request
+        
+        The system messages and job requirements are sent once for the whole
+        batch. Returns one score()-shaped result per candidate, in order;
+        candidates missing from the reply are scored on their own.
+        """
+        if all_facts is None:
+            all_facts = get_factual_baselines(candidates, jd.requirements, jd.required_lower)
+        
+        if len(candidates) == 1:
+            return [await self.score(candidates[0], jd, all_facts[0])]
+        
+        all_prepared = [
+            self._prepare_all(candidate, jd, facts)
+            for candidate, facts in zip(candidates, all_facts)
+        ]
+        ids = [f"candidate_{i}" for i in range(1, len(candidates) + 1)]
+        system, prompt = self._build_batch_prompt(ids, [
+            {name: sections for name, (sections, _) in prepared.items()}
+            for prepared in all_prepared
+        ])
+        
+        reply = await self._query_json(
+            prompt,
+            max_tokens=2000 * len(self.agents) * len(candidates),
+            schema=object_schema({candidate_id: self.response_schema for candidate_id in ids}),
+            system=system
+        ) or {}
+        
+        return list(await asyncio.gather(*[
+            self._finish_all(candidate, jd, facts, prepared, reply.get(candidate_id))
+            for candidate, facts, prepared, candidate_id in zip(candidates, all_facts, all_prepared, ids)
+        ]))
+    
+    def _prepare_all(self, candidate: Dict, jd: JDContext, facts: Dict) -> Dict[str, tuple]:
+        """Every agent's (sections, state) for one candidate"""
+        return {
+            name: agent.prepare(candidate, jd, facts)
+            for name, agent in self.agents.items()
+        }
+    
+    async def _finish_all(
+        self,
+        candidate: Dict,
+        jd: JDContext,
+        facts: Dict,
+        prepared: Dict[str, tuple],
+        reply: Optional[Dict]
+    ) -> Dict:
+        """Run each agent's finish() on its part of the reply"""
+        if not isinstance(reply, dict):
+            reply = {}
+        
+        results = {}
+        missing = []
+        for name, agent in self.agents.items():
+            llm_result = reply.get(name)
+            if not isinstance(llm_result, dict):
+                missing.append(name)
+                continue
+            llm_result["score"] = agent._validate_score(llm_result.get("score", 50))
+            results[name] = agent.finish(llm_result, prepared[name][1])
+        
+        # Whatever the combined reply lacked is asked for separately
+        if missing:
+            retried = await asyncio.gather(*[
+                self.agents[name].score(candidate, jd, facts) for name in missing
+            ])
+            results.update(zip(missing, retried))
+        
+        return results
+    
+    def _static_block(self, sections: Dict[str, tuple]) -> str:
+        """System messages and job requirements; identical for every candidate in a run"""
+        return "\n\n".join(
+            f"### {name}\n{system_message}\n\nJob requirements:\n{jd_context.strip()}"
+            for name, (system_message, _, jd_context, _) in sections.items()
+        )
+    
+    def _dynamic_block(self, sections: Dict[str, tuple]) -> str:
+        """Per-candidate instructions and data"""
+        return "\n\n".join(
+            f"### {name}\nInstructions:\n{instructions.strip()}\n\nCandidate information:\n{compact_context(candidate_context)}"
+            for name, (_, candidate_context, _, instructions) in sections.items()
+        )
+    
+    def _build_system(self, sections: Dict[str, tuple]) -> str:
+        """System prompt shared by every request in a run, so Ollama reuses its prefill"""
+        return f"""You evaluate candidates for one job in {len(sections)} independent sections. Answer each section on its own terms.
+
+=== EVALUATORS AND JOB REQUIREMENTS ===
+{self._static_block(sections)}
+
+Each section's answer is the JSON object its instructions ask for; where a section gives no format, use:
+{DEFAULT_FORMAT}
+
+Do not include any text outside the JSON object."""
+    
+    def _build_combined_prompt(self, sections: Dict[str, tuple]) -> Tuple[str, str]:
+        """
+        (system, prompt) holding every agent's sections
+        
+        The system messages and job requirements (shared by every candidate
+        in a run) go in the system prompt; only the per-candidate instructions
+        and data are in the prompt.
+        """
+        keys = ", ".join(f'"{name}"' for name in sections)
+        
+        return self._build_system(sections), f"""=== CANDIDATE EVALUATIONS ===
+{self._dynamic_block(sections)}
+
+Return one valid JSON object with exactly the keys {keys}."""
+    
+    def _build_batch_prompt(self, ids: List[str], batch_sections: List[Dict[str, tuple]]) -> Tuple[str, str]:
+        """(system, prompt) holding every agent's sections for several candidates"""
+        sections = batch_sections[0]
+        keys = ", ".join(f'"{name}"' for name in sections)
+        candidate_keys = ", ".join(f'"{candidate_id}"' for candidate_id in ids)
+        candidates = "\n\n".join(
+            f"=== {candidate_id.upper()} ===\n{self._dynamic_block(candidate_sections)}"
+            for candidate_id, candidate_sections in zip(ids, batch_sections)
+        )
+        
+        return self._build_system(sections), f"""Evaluate these {len(ids)} candidates. Judge every candidate on their own; do not compare them with each other.
+
+{candidates}
+
+Return one valid JSON object with exactly the keys {candidate_keys}. Each value is an object with exactly the keys {keys}."""
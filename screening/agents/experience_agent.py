@@ -1,10 +1,65 @@
 # screening/agents/experience_agent.py
 
-from typing import Dict
-from .base_agent import BaseAgent
+from string import Template
+from typing import Dict, Optional, Tuple
+from config import MAX_EXPERIENCE_ITEMS
+from .base_agent import ADJUSTMENT_SCHEMA, BaseAgent, PromptSections
+from parsers.jd_parser import JDContext
 from utils.factual_extraction import get_factual_baseline
 
 
+# Prompt text shared by every candidate; only the $fields vary per call
+_SYSTEM_MESSAGE = """You are a career analyst providing context-based adjustment to a rule-based experience score.
+
+IMPORTANT:
+- Years of experience have been calculated from dates (factual)
+- Role relevance has been determined by keyword matching (factual)
+- Your job is to assess career progression quality and adjust score by -10 to +10
+
+Consider:
+1. Career trajectory (progression vs stagnation)
+2. Job stability (tenure patterns)
+3. Company quality/reputation
+4. Role complexity evolution
+"""
+
+_INSTRUCTIONS = Template("""
+Given baseline score of $base_score/100 from:
+- $years years experience (required: $min_required)
+- Role relevance: $role_relevant
+
+Provide adjustment (-10 to +10) based on:
+1. Career progression - are they growing in responsibility?
+2. Job stability - concerning frequent switches (<1.5 yr) or healthy tenure?
+3. Career trajectory - upward, lateral, or downward?
+4. Role alignment - even if not technical, is there transferable leadership?
+
+Be harsh if:
+- Irrelevant experience with no progression
+- Very short tenures repeatedly
+- Career regression evident
+
+Be generous if:
+- Clear upward trajectory
+- Stable tenure with growth
+- Increasing responsibility
+
+Return JSON:
+{
+  "adjustment": <-10 to +10>,
+  "final_score": <baseline + adjustment>,
+  "reasoning": "<justify adjustment>",
+  "strengths": ["<based on actual roles>"],
+  "weaknesses": ["<based on gaps/concerns>"],
+  "category_scores": {
+    "years_match": <subscore>,
+    "role_relevance": <subscore>,
+    "progression_quality": <subscore>
+  }
+}
+""")
+
+
 class ExperienceAgent(BaseAgent):
     """
     Hybrid Experience Evaluation:
@@ -12,11 +67,14 @@ class ExperienceAgent(BaseAgent):
     - LLM: Career progression assessment, stability analysis
     """
     
-    async def score(self, candidate: Dict, jd_requirements: Dict) -> Dict:
-        """Score candidate using hybrid approach"""
+    response_schema = ADJUSTMENT_SCHEMA
+    
+    def prepare(self, candidate: Dict, jd: JDContext, facts: Optional[Dict] = None) -> Tuple[PromptSections, Dict]:
+        """Rule-based baseline and LLM prompt (steps 1-2)"""
         
         # STEP 1: Get factual baseline
-        facts = get_factual_baseline(candidate, jd_requirements)
+        if facts is None:
+            facts = get_factual_baseline(candidate, jd.requirements, jd.required_lower)
         
         years = facts["years_of_experience"]
         min_required = facts["min_required_years"]
@@ -59,65 +117,35 @@ EXPERIENCE HISTORY:
 RULE-BASED SCORE: {base_score:.0f}/100
 """
         
-        jd_context = f"""
-Minimum Experience: {min_required} years
-Role Level: {jd_requirements.get('role_level', 'Not specified')}
-"""
-        
-        system_message = """You are a career analyst providing context-based adjustment to a rule-based experience score.
-
-IMPORTANT:
-- Years of experience have been calculated from dates (factual)
-- Role relevance has been determined by keyword matching (factual)
-- Your job is to assess career progression quality and adjust score by -10 to +10
-
-Consider:
-1. Career trajectory (progression vs stagnation)
-2. Job stability (tenure patterns)
-3. Company quality/reputation
-4. Role complexity evolution
-"""
+        jd_context = jd.experience
         
-        instructions = f"""
-Given baseline score of {base_score:.0f}/100 from:
-- {years} years experience (required: {min_required})
-- Role relevance: {role_relevant}
-
-Provide adjustment (-10 to +10) based on:
-1. Career progression - are they growing in responsibility?
-2. Job stability - concerning frequent switches (<1.5 yr) or healthy tenure?
-3. Career trajectory - upward, lateral, or downward?
-4. Role alignment - even if not technical, is there transferable leadership?
-
-Be harsh if:
-- Irrelevant experience with no progression
-- Very short tenures repeatedly
-- Career regression evident
-
-Be generous if:
-- Clear upward trajectory
-- Stable tenure with growth
-- Increasing responsibility
-
-Return JSON:
-{{
-  "adjustment": <-10 to +10>,
-  "final_score": <baseline + adjustment>,
-  "reasoning": "<justify adjustment>",
-  "strengths": ["<based on actual roles>"],
-  "weaknesses": ["<based on gaps/concerns>"],
-  "category_scores": {{
-    "years_match": <subscore>,
-    "role_relevance": <subscore>,
-    "progression_quality": <subscore>
-  }}
-}}
-"""
+        system_message = _SYSTEM_MESSAGE
         
-        prompt = self._build_prompt(system_message, candidate_context, jd_context, instructions)
+        instructions = _INSTRUCTIONS.substitute(
+            base_score=f"{base_score:.0f}",
+            years=years,
+            min_required=min_required,
+            role_relevant=role_relevant
+        )
         
-        # STEP 3: Get LLM adjustment
-        llm_result = await self._query_llm(prompt)
+        state = {
+            "facts": facts,
+            "years": years,
+            "min_required": min_required,
+            "role_relevant": role_relevant,
+            "year_score": year_score,
+            "base_score": base_score
+        }
+        return (system_message, candidate_context, jd_context, instructions), state
+    
+    def finish(self, llm_result: Dict, state: Dict) -> Dict:
+        """Blend the LLM adjustment (step 3) into the baseline"""
+        facts = state["facts"]
+        years = state["years"]
+        min_required = state["min_required"]
+        role_relevant = state["role_relevant"]
+        year_score = state["year_score"]
+        base_score = state["base_score"]
         
         adjustment = max(-10, min(10, llm_result.get("adjustment", 0)))
         final_score = max(0, min(100, base_score + adjustment))
@@ -146,12 +174,9 @@ Return JSON:
         if not experience:
             return "No experience listed"
         
-        formatted = []
-        for exp in experience:
-            company = exp.get("company", "Unknown")
-            position = exp.get("position", "Unknown")
-            start = exp.get("start_date", "")
-            end = exp.get("end_date", "Present")
-            formatted.append(f"- {position} at {company} ({start} - {end})")
-        
-        return '\n'.join(reversed(formatted))  # Chronological order
\ No newline at end of file
+        # Resumes list the latest role first: keep the most recent, shown chronologically
+        return '\n'.join(
+            f"- {exp.get('position', 'Unknown')} at {exp.get('company', 'Unknown')} "
+            f"({exp.get('start_date', '')} - {exp.get('end_date', 'Present')})"
+            for exp in reversed(experience[:MAX_EXPERIENCE_ITEMS])
+        )
\ No newline at end of file
@@ -1,57 +1,12 @@
 # screening/agents/fit_agent.py
 
-from typing import Dict
-from .base_agent import BaseAgent
+from typing import Dict, Optional, Tuple
+from .base_agent import BaseAgent, PromptSections
+from parsers.jd_parser import JDContext
 
 
-class FitAgent(BaseAgent):
-    """
-    Evaluates resume quality, attitude indicators, and cultural fit
-    Covers: Resume Quality + Attitude/Aptitude + Cultural Fit
-    Weight: 25%
-    """
-    
-    async def score(self, candidate: Dict, jd_requirements: Dict) -> Dict:
-        """Score candidate's fit and soft indicators"""
-        
-        # Extract candidate data
-        experience = candidate.get("experience", [])
-        projects = candidate.get("projects", [])
-        achievements = candidate.get("achievements", [])
-        personal_info = candidate.get("personal_info", {})
-        
-        # Analyze resume structure
-        resume_quality = self._assess_resume_quality(candidate)
-        
-        # Build candidate context
-        candidate_context = f"""
-Resume Quality Assessment:
-{resume_quality}
-
-Work Experience Summary:
-{self._summarize_experience(experience)}
-
-Project Portfolio:
-{len(projects)} projects demonstrating hands-on work
-
-Achievements & Recognition:
-{self._summarize_achievements(achievements)}
-
-Communication & Presentation:
-- Contact details provided: {bool(personal_info.get('email')) and bool(personal_info.get('phone'))}
-- Professional online presence: {bool(personal_info.get('linkedin'))}
-"""
-        
-        # Build JD context
-        jd_context = f"""
-Role Level: {jd_requirements.get('role_level', 'mid')}
-Culture Indicators: {', '.join(jd_requirements.get('culture_indicators', []))}
-Key Responsibilities: {', '.join(jd_requirements.get('key_responsibilities', []))}
-Must-Have Qualifications: {', '.join(jd_requirements.get('must_have_qualifications', []))}
-"""
-        
-        # System message
-        system_message = """You are an expert organizational psychologist and resume analyst evaluating candidate fit.
+# Prompt text shared by every candidate
+_SYSTEM_MESSAGE = """You are an expert organizational psychologist and resume analyst evaluating candidate fit.
 
 Evaluate based on:
 1. Resume Quality & Communication
@@ -82,8 +37,8 @@ Scoring Guidelines:
 - 60-74: Adequate fit, reasonable alignment, acceptable quality
 - 45-59: Questionable fit, weak alignment, quality concerns
 - 0-44: Poor fit, misalignment, significant quality issues"""
-        
-        instructions = """Analyze the candidate's fit and soft indicators.
+
+_INSTRUCTIONS = """Analyze the candidate's fit and soft indicators.
 
 Provide category scores for:
 - resume_quality: Presentation, clarity, professionalism
@@ -98,11 +53,55 @@ Consider:
 - Balance between stability and ambition
 - Alignment with role expectations and company culture
 - Red flags in presentation or content"""
+
+
+class FitAgent(BaseAgent):
+    """
+    Evaluates resume quality, attitude indicators, and cultural fit
+    Covers: Resume Quality + Attitude/Aptitude + Cultural Fit
+    Weight: 25%
+    """
+    
+    def prepare(self, candidate: Dict, jd: JDContext, facts: Optional[Dict] = None) -> Tuple[PromptSections, Dict]:
+        """Build the LLM prompt; the reply is used as-is"""
+        
+        # Extract candidate data
+        experience = candidate.get("experience", [])
+        projects = candidate.get("projects", [])
+        achievements = candidate.get("achievements", [])
+        personal_info = candidate.get("personal_info", {})
+        
+        # Analyze resume structure
+        resume_quality = self._assess_resume_quality(candidate)
+        
+        # Build candidate context
+        candidate_context = f"""
+Resume Quality Assessment:
+{resume_quality}
+
+Work Experience Summary:
+{self._summarize_experience(experience)}
+
+Project Portfolio:
+{len(projects)} projects demonstrating hands-on work
+
+Achievements & Recognition:
+{self._summarize_achievements(achievements)}
+
+Communication & Presentation:
+- Contact details provided: {bool(personal_info.get('email')) and bool(personal_info.get('phone'))}
+- Professional online presence: {bool(personal_info.get('linkedin'))}
+"""
         
-        prompt = self._build_prompt(system_message, candidate_context, jd_context, instructions)
-        result = await self._query_llm(prompt)
+        # Build JD context
+        jd_context = jd.fit
+        
+        # System message
+        system_message = _SYSTEM_MESSAGE
         
-        return result
+        instructions = _INSTRUCTIONS
+        
+        return (system_message, candidate_context, jd_context, instructions), {}
     
     def _assess_resume_quality(self, candidate: Dict) -> str:
         """Assess overall resume quality"""
@@ -138,13 +137,11 @@ Consider:
         if not experience:
             return "No experience listed"
         
-        summary = []
-        for exp in experience:
-            company = exp.get("company", "Unknown")
-            position = exp.get("position", "Unknown")
-            summary.append(f"- {position} at {company}")
-        
-        return '\n'.join(summary[:3])  # Top 3 roles
+        # Top 3 roles
+        return '\n'.join(
+            f"- {exp.get('position', 'Unknown')} at {exp.get('company', 'Unknown')}"
+            for exp in experience[:3]
+        )
     
     def _summarize_achievements(self, achievements: list) -> str:
         """Summarize achievements"""
@@ -1,10 +1,61 @@
 # screening/agents/skill_agent.py
 
-from typing import Dict
-from .base_agent import BaseAgent
+from string import Template
+from typing import Dict, Optional, Tuple
+from config import MAX_PROJECT_ITEMS
+from .base_agent import ADJUSTMENT_SCHEMA, BaseAgent, PromptSections
+from parsers.jd_parser import JDContext
 from utils.factual_extraction import get_factual_baseline
 
 
+# Prompt text shared by every candidate; only the $fields vary per call
+_SYSTEM_MESSAGE = """You are a technical recruiter providing context-based adjustment to a rule-based score.
+
+IMPORTANT: 
+- The factual matching has already been done by rules
+- You CANNOT change which skills matched or didn't match
+- Your job is to adjust the baseline score by -10 to +10 points based on:
+  1. Transferable skills (e.g., Java experience helps with Python)
+  2. Project portfolio quality (hands-on evidence)
+  3. Learning potential (related background)
+  4. Depth vs breadth considerations
+
+RULES:
+- If candidate has 0 matching skills and irrelevant background: adjustment = -5 to 0
+- If candidate has some matches with good projects: adjustment = 0 to +10
+- Your adjustment must be justified by actual data provided
+"""
+
+_INSTRUCTIONS = Template("""
+Given the baseline score of $base_score/100 from rule-based matching:
+
+Provide an adjustment (-10 to +10 points) based on:
+1. Are there transferable skills? (e.g., JavaScript → Node.js, Java → backend)
+2. Do projects demonstrate practical ability beyond listed skills?
+3. Does education background suggest learning capability?
+4. Is there potential for quick ramp-up?
+
+Be conservative:
+- No technical skills + no projects = negative adjustment
+- Some matches + good projects = positive adjustment
+- Irrelevant degree + no tech skills = negative adjustment
+
+Return JSON:
+{
+  "adjustment": <number -10 to +10>,
+  "final_score": <baseline + adjustment>,
+  "reasoning": "<justify your adjustment with specific evidence>",
+  "strengths": ["<based on factual matched skills>"],
+  "weaknesses": ["<based on factual missing skills>"],
+  "category_scores": {
+    "skill_match": <skills subscore>,
+    "education_relevance": <education subscore>,
+    "project_quality": <projects subscore>
+  }
+}
+""")
+
+
 class SkillAgent(BaseAgent):
     """
     Hybrid Technical Evaluation:
@@ -12,11 +63,14 @@ class SkillAgent(BaseAgent):
     - LLM: Context adjustment, transferable skills assessment
     """
     
-    async def score(self, candidate: Dict, jd_requirements: Dict) -> Dict:
-        """Score candidate using hybrid approach"""
+    response_schema = ADJUSTMENT_SCHEMA
+    
+    def prepare(self, candidate: Dict, jd: JDContext, facts: Optional[Dict] = None) -> Tuple[PromptSections, Dict]:
+        """Rule-based baseline and LLM prompt (steps 1-2)"""
         
         # STEP 1: Get factual baseline (rule-based)
-        facts = get_factual_baseline(candidate, jd_requirements)
+        if facts is None:
+            facts = get_factual_baseline(candidate, jd.requirements, jd.required_lower)
         
         # Calculate base score from facts
         # 60% from skill matching, 40% from education relevance
@@ -43,65 +97,29 @@ RULE-BASED ANALYSIS:
 - Baseline score: {base_score:.0f}/100
 
 PROJECT DETAILS:
-{self._format_projects(candidate)}
+{self._format_projects(candidate, facts['required_skills'])}
 """
         
-        jd_context = f"""
-Required Technical Skills: {', '.join(jd_requirements.get('required_skills', []))}
-Preferred Skills: {', '.join(jd_requirements.get('preferred_skills', []))}
-Role Level: {jd_requirements.get('role_level', 'Not specified')}
-"""
+        jd_context = jd.skill
         
-        system_message = """You are a technical recruiter providing context-based adjustment to a rule-based score.
-
-IMPORTANT: 
-- The factual matching has already been done by rules
-- You CANNOT change which skills matched or didn't match
-- Your job is to adjust the baseline score by -10 to +10 points based on:
-  1. Transferable skills (e.g., Java experience helps with Python)
-  2. Project portfolio quality (hands-on evidence)
-  3. Learning potential (related background)
-  4. Depth vs breadth considerations
-
-RULES:
-- If candidate has 0 matching skills and irrelevant background: adjustment = -5 to 0
-- If candidate has some matches with good projects: adjustment = 0 to +10
-- Your adjustment must be justified by actual data provided
-"""
-        
-        instructions = f"""
-Given the baseline score of {base_score:.0f}/100 from rule-based matching:
-
-Provide an adjustment (-10 to +10 points) based on:
-1. Are there transferable skills? (e.g., JavaScript → Node.js, Java → backend)
-2. Do projects demonstrate practical ability beyond listed skills?
-3. Does education background suggest learning capability?
-4. Is there potential for quick ramp-up?
-
-Be conservative:
-- No technical skills + no projects = negative adjustment
-- Some matches + good projects = positive adjustment
-- Irrelevant degree + no tech skills = negative adjustment
-
-Return JSON:
-{{
-  "adjustment": <number -10 to +10>,
-  "final_score": <baseline + adjustment>,
-  "reasoning": "<justify your adjustment with specific evidence>",
-  "strengths": ["<based on factual matched skills>"],
-  "weaknesses": ["<based on factual missing skills>"],
-  "category_scores": {{
-    "skill_match": <skills subscore>,
-    "education_relevance": <education subscore>,
-    "project_quality": <projects subscore>
-  }}
-}}
-"""
+        system_message = _SYSTEM_MESSAGE
         
-        prompt = self._build_prompt(system_message, candidate_context, jd_context, instructions)
+        instructions = _INSTRUCTIONS.substitute(base_score=f"{base_score:.0f}")
         
-        # STEP 3: Get LLM adjustment
-        llm_result = await self._query_llm(prompt)
+        state = {
+            "facts": facts,
+            "skill_score": skill_score,
+            "education_score": education_score,
+            "base_score": base_score
+        }
+        return (system_message, candidate_context, jd_context, instructions), state
+    
+    def finish(self, llm_result: Dict, state: Dict) -> Dict:
+        """Blend the LLM adjustment (step 3) into the baseline"""
+        facts = state["facts"]
+        skill_score = state["skill_score"]
+        education_score = state["education_score"]
+        base_score = state["base_score"]
         
         # STEP 4: Combine rule-based facts with LLM context
         adjustment = llm_result.get("adjustment", 0)
@@ -130,18 +148,22 @@ Return JSON:
             }
         }
     
-    def _format_projects(self, candidate: Dict) -> str:
-        """Format projects for LLM context"""
+    def _format_projects(self, candidate: Dict, required_skills: list) -> str:
+        """Format the projects using the most required skills for LLM context"""
         projects = candidate.get("projects", [])
         
         if not projects:
             return "No projects listed"
         
-        formatted = []
-        for proj in projects[:5]:
-            name = proj.get("name", "Unnamed")
-            desc = proj.get("description", "")
-            tech = ', '.join(proj.get("technologies", []))
-            formatted.append(f"- {name}: {desc[:100]} (Tech: {tech})")
+        # Stable sort, so equally relevant projects keep resume order
+        required = {skill.lower() for skill in required_skills}
+        projects = sorted(
+            projects,
+            key=lambda proj: -len(required.intersection(tech.lower() for tech in proj.get("technologies", [])))
+        )
         
-        return '\n'.join(formatted)
\ No newline at end of file
+        return '\n'.join(
+            f"- {proj.get('name', 'Unnamed')}: {proj.get('description', '')[:100]} "
+            f"(Tech: {', '.join(proj.get('technologies', []))})"
+            for proj in projects[:MAX_PROJECT_ITEMS]
+        )
\ No newline at end of file
@@ -5,13 +5,36 @@ from pathlib import Path
 
 # Ollama Configuration
 OLLAMA_BASE_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
-OLLAMA_MODEL = "llama3.2:latest"
+OLLAMA_MODEL = "llama3.2:3b-instruct-q4_K_M"
 OLLAMA_TIMEOUT = 120
+# Candidates scored at once; match the server's OLLAMA_NUM_PARALLEL (set that
+# env var on `ollama serve` so it actually runs requests concurrently)
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "2"))
+# Draft model for speculative decoding (e.g. "llama3.2:1b"); off unless set.
+# Only servers built with llama.cpp draft support honour it - stock Ollama
+# ignores the option, and the draft model must be pulled locally
+OLLAMA_DRAFT_MODEL = os.getenv("OLLAMA_DRAFT_MODEL") or None
+# Reply format when a request has no schema; "json" makes Ollama emit valid
+# JSON only. Set OLLAMA_FORMAT="" to allow free text
+OLLAMA_FORMAT = os.getenv("OLLAMA_FORMAT", "json")
+# Pooled keep-alive connections the client holds to Ollama
+OLLAMA_MAX_CONNECTIONS = 32
+# Multiplex requests over one HTTP/2 connection; needs `pip install httpx[http2]`
+# and an HTTP/2 (TLS) proxy in front of Ollama, which itself speaks HTTP/1.1
+OLLAMA_HTTP2 = os.getenv("OLLAMA_HTTP2", "0") == "1"
+# How long Ollama keeps the model (and the cached system-prompt prefill) loaded
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
 
 # Paths - UPDATED
 BASE_DIR = Path(__file__).parent.parent  # Goes up to project root
 RESUME_DIR = BASE_DIR / "data" / "parsed_resumes"  # Now points to correct location
 
+# Agent response cache (SQLite); entries expire after LLM_CACHE_TTL seconds
+LLM_CACHE_PATH = BASE_DIR / ".cache" / "llm.sqlite3"
+LLM_CACHE_TTL = 7 * 24 * 3600
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") != "0"  # LLM_CACHE=0 always queries Ollama
+LLM_CACHE_MEMORY_SIZE = 256  # Recent entries also kept in process, in front of SQLite
+
 # Agent Weights
 WEIGHTS = {
     "technical": 0.40,
@@ -25,7 +48,12 @@ MAX_SCORE = 100
 
 # Processing Configuration
 PARALLEL_AGENTS = True
-BATCH_SIZE = 1
+COMBINE_AGENTS = True  # One LLM request per candidate for all three agents
+# Prompt size caps: most recent roles / most JD-relevant projects shown to agents
+MAX_EXPERIENCE_ITEMS = 5
+MAX_PROJECT_ITEMS = 5
+BATCH_SIZE = 1  # Candidates packed into one combined LLM request (try 4-8 on larger models)
 
 # Output Configuration
-SHOW_BREAKDOWN = False
\ No newline at end of file
+SHOW_BREAKDOWN = False
+PROGRESS_INTERVAL = 0.1  # Seconds between screening progress lines
\ No newline at end of file
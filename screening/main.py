@@ -1,83 +1,187 @@
 # screening/main.py
 
 import asyncio
+import heapq
 import json
+import sys
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional
 import time
 
-from config import RESUME_DIR, WEIGHTS, OLLAMA_MODEL
-from services.json_loader import load_resumes
+from config import RESUME_DIR, WEIGHTS, OLLAMA_MODEL, OLLAMA_NUM_PARALLEL, COMBINE_AGENTS, BATCH_SIZE, PROGRESS_INTERVAL
+from services.json_loader import load_resumes, validate_resumes
 from services.ollama_client import OllamaClient
-from parsers.jd_parser import parse_job_description
-from agents.skill_agent import SkillAgent
-from agents.experience_agent import ExperienceAgent
-from agents.fit_agent import FitAgent
-from utils.scoring import combine_scores
+from parsers.jd_parser import JDContext, parse_job_description
+from agents.combined_agent import CombinedAgent
+from utils.factual_extraction import get_factual_baseline, get_factual_baselines
+from utils.scoring import ScoreResult, combine_scores, combine_scores_batch, prepare_weights
+
+
+# Agent weights unpacked once for every candidate
+SCORE_WEIGHTS = prepare_weights(WEIGHTS)
 
 
 async def score_candidate(
     candidate: Dict,
-    jd_requirements: Dict,
-    ollama_client: OllamaClient
+    jd: JDContext,
+    agents: CombinedAgent,
+    facts: Optional[Dict] = None
 ) -> Dict:
-    """Score a single candidate using all three agents in parallel"""
+    """
+    Score a single candidate using all three agents (one combined request by default)
     
-    skill_agent = SkillAgent(ollama_client)
-    exp_agent = ExperienceAgent(ollama_client)
-    fit_agent = FitAgent(ollama_client)
+    `agents` is built once per run by screen_candidates and shared by every
+    candidate; with COMBINE_AGENTS off its skill/experience/fit agents are
+    queried separately. `facts` is the candidate's precomputed factual baseline.
+    """
     
-    # Run agents in parallel
-    results = await asyncio.gather(
-        skill_agent.score(candidate, jd_requirements),
-        exp_agent.score(candidate, jd_requirements),
-        fit_agent.score(candidate, jd_requirements)
-    )
+    if COMBINE_AGENTS:
+        results = await agents.score(candidate, jd, facts)
+    else:
+        # Skill and experience agents share one factual baseline
+        if facts is None:
+            facts = get_factual_baseline(candidate, jd.requirements, jd.required_lower)
+        
+        # Run agents in parallel
+        skill, experience, fit = await asyncio.gather(
+            agents.agents["skill"].score(candidate, jd, facts),
+            agents.agents["experience"].score(candidate, jd, facts),
+            agents.agents["fit"].score(candidate, jd, facts)
+        )
+        results = {"skill": skill, "experience": experience, "fit": fit}
     
     # Combine scores
     final_score = combine_scores(
-        technical=results[0],
-        career=results[1],
-        fit=results[2],
-        weights=WEIGHTS
+        technical=results["skill"],
+        career=results["experience"],
+        fit=results["fit"],
+        weights=SCORE_WEIGHTS
     )
     
+    return _candidate_result(candidate, final_score)
+
+
+async def score_candidates(
+    candidates: List[Dict],
+    jd: JDContext,
+    agents: CombinedAgent,
+    all_facts: List[Dict]
+) -> List[Dict]:
+    """Score a batch of candidates, packed into one combined request when COMBINE_AGENTS is on"""
+    
+    if COMBINE_AGENTS and len(candidates) > 1:
+        all_results = await agents.score_batch(candidates, jd, all_facts)
+        final_scores = combine_scores_batch(
+            technical=[results["skill"] for results in all_results],
+            career=[results["experience"] for results in all_results],
+            fit=[results["fit"] for results in all_results],
+            weights=SCORE_WEIGHTS
+        )
+        return [_candidate_result(candidate, final_score) for candidate, final_score in zip(candidates, final_scores)]
+    
+    return list(await asyncio.gather(*[
+        score_candidate(candidate, jd, agents, facts) for candidate, facts in zip(candidates, all_facts)
+    ]))
+
+
+def _candidate_result(candidate: Dict, final_score: ScoreResult) -> Dict:
+    """Final ranked entry from the combine_scores() result"""
+    
     return {
         "candidate_id": candidate.get("_id", "unknown"),
         "name": candidate["personal_info"]["name"],
         "email": candidate["personal_info"]["email"],
         "phone": candidate["personal_info"].get("phone", "N/A"),
-        "total_score": final_score["total"],
-        "breakdown": final_score["breakdown"]
+        "total_score": final_score.total,
+        "breakdown": final_score.breakdown
     }
 
 
-async def screen_candidates(jd_text: str, resume_dir: Path = RESUME_DIR) -> List[Dict]:
-    """Main screening pipeline"""
+async def screen_candidates(
+    jd_text: str,
+    resume_dir: Path = RESUME_DIR,
+    resumes: Optional[List[Dict]] = None,
+    ollama_client: Optional[OllamaClient] = None,
+    top_k: Optional[int] = None
+) -> List[Dict]:
+    """
+    Main screening pipeline
     
-    start_time = time.time()
+    Pass already-parsed resumes via `resumes` to screen them in memory
+    instead of loading JSONs from resume_dir. Long-running callers (the API)
+    pass their shared `ollama_client` instead of building one per run.
+    With `top_k`, only the best k candidates are kept (bounded heap) and returned.
+    """
     
-    # Initialize Ollama client
-    ollama_client = OllamaClient()
+    # Initialize Ollama client; one built here is closed when the run ends
+    if ollama_client is None:
+        async with OllamaClient() as ollama_client:
+            return await screen_candidates(jd_text, resume_dir, resumes, ollama_client, top_k)
+    
+    start_time = time.time()
     
     # Parse job description
     print("Parsing job description...")
     jd_requirements = await parse_job_description(jd_text, ollama_client)
+    jd = JDContext.from_requirements(jd_requirements)
+    agents = CombinedAgent(ollama_client)
     
     # Load resume JSONs
-    print(f"Loading resumes from {resume_dir}...")
-    candidates = load_resumes(resume_dir)
+    if resumes is not None:
+        candidates = validate_resumes(resumes)
+    else:
+        print(f"Loading resumes from {resume_dir}...")
+        candidates = load_resumes(resume_dir)
     print(f"Found {len(candidates)} candidates")
     
-    # Score each candidate
-    results = []
-    for idx, candidate in enumerate(candidates, 1):
-        print(f"Screening candidate {idx}/{len(candidates)}: {candidate['personal_info']['name']}...")
-        result = await score_candidate(candidate, jd_requirements, ollama_client)
-        results.append(result)
+    # Rule-based facts for the whole run in one pass, before the LLM fan-out
+    all_facts = get_factual_baselines(candidates, jd.requirements, jd.required_lower)
+    
+    # Score candidates concurrently, BATCH_SIZE per request and a few
+    # requests at a time so Ollama isn't flooded
+    sem = asyncio.Semaphore(OLLAMA_NUM_PARALLEL)
+    batch_size = max(1, BATCH_SIZE)
+    
+    async def score_bounded(start: int):
+        end = start + batch_size
+        async with sem:
+            return start, await score_candidates(candidates[start:end], jd, agents, all_facts[start:end])
+    
+    # Min-heap of (score, -idx, result): the root is the weakest kept candidate;
+    # -idx keeps earlier candidates ahead on equal scores, as a stable sort would
+    heap = []
+    done = 0
+    last_report = 0.0
+    tasks = [
+        asyncio.ensure_future(score_bounded(start))
+        for start in range(0, len(candidates), batch_size)
+    ]
+    try:
+        for future in asyncio.as_completed(tasks):
+            start, batch_results = await future
+            for idx, result in enumerate(batch_results, start):
+                done += 1
+                
+                entry = (result["total_score"], -idx, result)
+                if top_k is None or len(heap) < top_k:
+                    heapq.heappush(heap, entry)
+                elif heap and entry[:2] > heap[0][:2]:
+                    heapq.heapreplace(heap, entry)
+            
+            # Progress at most PROGRESS_INTERVAL apart rather than one line per candidate
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL or done == len(candidates):
+                last_report = now
+                print(f"Screened {done}/{len(candidates)} candidates")
+    finally:
+        # If a batch failed, stop the rest instead of leaving them sending
+        # requests, and collect every outcome so none goes unretrieved
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
     
     # Rank by score
-    ranked_results = sorted(results, key=lambda x: x["total_score"], reverse=True)
+    ranked_results = [entry[2] for entry in sorted(heap, key=lambda e: e[:2], reverse=True)]
     
     end_time = time.time()
     screening_time = end_time - start_time
@@ -85,6 +189,17 @@ async def screen_candidates(jd_text: str, resume_dir: Path = RESUME_DIR) -> List
     return ranked_results, screening_time
 
 
+def use_uvloop():
+    """Switch asyncio to uvloop when it's installed (optional; not available on Windows)"""
+    if sys.platform == "win32":
+        return
+    try:
+        import uvloop
+    except ImportError:
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
 def display_results(results: List[Dict], screening_time: float):
     """Display screening results in terminal"""
     
@@ -133,4 +248,5 @@ async def main():
 
 
 if __name__ == "__main__":
+    use_uvloop()
     asyncio.run(main())
\ No newline at end of file
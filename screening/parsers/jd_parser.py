@@ -1,11 +1,79 @@
 # screening/parsers/jd_parser.py
 
-import json
-from typing import Dict
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from services.llm_cache import llm_cache
+from utils.factual_extraction import lower_skills
+from utils.json_extract import extract_json
+
+
+_STRING_LIST = {"type": "array", "items": {"type": "string"}}
+
+# Shape of the requirements reply; Ollama constrains decoding to it
+JD_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "required_skills": _STRING_LIST,
+        "preferred_skills": _STRING_LIST,
+        "min_experience_years": {"type": "number"},
+        "education_requirements": {"type": "string"},
+        "role_level": {"type": "string"},
+        "key_responsibilities": _STRING_LIST,
+        "culture_indicators": _STRING_LIST,
+        "domain": {"type": "string"},
+        "must_have_qualifications": _STRING_LIST,
+        "risk_factors_to_watch": _STRING_LIST
+    },
+    "required": [
+        "required_skills", "preferred_skills", "min_experience_years",
+        "education_requirements", "role_level", "key_responsibilities",
+        "culture_indicators", "domain", "must_have_qualifications",
+        "risk_factors_to_watch"
+    ]
+}
+
+
+@dataclass(frozen=True)
+class JDContext:
+    """
+    Parsed JD requirements plus each agent's JD prompt section, rendered once per run
+    
+    Every candidate reuses the same strings, so the agent prompts' shared
+    prefix is byte-identical across the run.
+    """
+    requirements: Dict
+    skill: str
+    experience: str
+    fit: str
+    required_lower: List[Tuple[str, str]]  # lower_skills() of the required skills
+    
+    @classmethod
+    def from_requirements(cls, jd_requirements: Dict) -> "JDContext":
+        """Render the agents' JD sections from parsed requirements"""
+        return cls(
+            requirements=jd_requirements,
+            skill=f"""
+Required Technical Skills: {', '.join(jd_requirements.get('required_skills', []))}
+Preferred Skills: {', '.join(jd_requirements.get('preferred_skills', []))}
+Role Level: {jd_requirements.get('role_level', 'Not specified')}
+""",
+            experience=f"""
+Minimum Experience: {jd_requirements.get('min_experience_years', 0)} years
+Role Level: {jd_requirements.get('role_level', 'Not specified')}
+""",
+            fit=f"""
+Role Level: {jd_requirements.get('role_level', 'mid')}
+Culture Indicators: {', '.join(jd_requirements.get('culture_indicators', []))}
+Key Responsibilities: {', '.join(jd_requirements.get('key_responsibilities', []))}
+Must-Have Qualifications: {', '.join(jd_requirements.get('must_have_qualifications', []))}
+""",
+            required_lower=lower_skills(jd_requirements.get("required_skills", []))
+        )
 
 
 async def parse_job_description(jd_text: str, ollama_client) -> Dict:
-    """Extract structured requirements from job description text"""
+    """Extract structured requirements from job description text (cached per JD + model)"""
     
     prompt = f"""Analyze this job description and extract key information in JSON format.
 
@@ -40,32 +108,30 @@ Return ONLY a valid JSON object with these keys:
 
 Do not include any explanation, only return the JSON object."""
 
-    response = await ollama_client.query(prompt)
+    cache_key = llm_cache.key(ollama_client.model, prompt)
+    jd_requirements = await llm_cache.aget(cache_key)
+    if jd_requirements is not None:
+        return jd_requirements
+    
+    response = await ollama_client.query(prompt, schema=JD_SCHEMA)
+    
+    jd_requirements = extract_json(response)
     
-    try:
-        # Try to parse JSON from response
-        jd_requirements = json.loads(response)
-    except json.JSONDecodeError:
-        # Fallback: try to extract JSON from markdown code blocks
-        if "```json" in response:
-            json_str = response.split("```json")[1].split("```")[0].strip()
-            jd_requirements = json.loads(json_str)
-        elif "```" in response:
-            json_str = response.split("```")[1].split("```")[0].strip()
-            jd_requirements = json.loads(json_str)
-        else:
-            # Last resort: return minimal structure
-            jd_requirements = {
-                "required_skills": [],
-                "preferred_skills": [],
-                "min_experience_years": 0,
-                "education_requirements": "",
-                "role_level": "mid",
-                "key_responsibilities": [],
-                "culture_indicators": [],
-                "domain": "",
-                "must_have_qualifications": [],
-                "risk_factors_to_watch": []
-            }
+    if jd_requirements is not None:
+        await llm_cache.aset(cache_key, jd_requirements)
+    else:
+        # Last resort: return minimal structure
+        jd_requirements = {
+            "required_skills": [],
+            "preferred_skills": [],
+            "min_experience_years": 0,
+            "education_requirements": "",
+            "role_level": "mid",
+            "key_responsibilities": [],
+            "culture_indicators": [],
+            "domain": "",
+            "must_have_qualifications": [],
+            "risk_factors_to_watch": []
+        }
     
     return jd_requirements
\ No newline at end of file
@@ -0,0 +1,115 @@
+# screening/services/llm_cache.py
+
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import orjson
+
+from config import LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_ENABLED, LLM_CACHE_MEMORY_SIZE
+
+
+class LLMCache:
+    """
+    Persistent cache of parsed agent responses, keyed by model + prompt
+    
+    Backed by a single SQLite file so repeated screenings of the same
+    candidate against the same JD skip the Ollama round-trip, across runs.
+    The most recent entries are also held in memory (as serialized JSON, so
+    callers can't mutate a cached value) to skip the SQLite read.
+    
+    Async code should use aget/aset, which keep the SQLite I/O off the event loop.
+    """
+    
+    def __init__(
+        self,
+        path: Path = LLM_CACHE_PATH,
+        ttl: int = LLM_CACHE_TTL,
+        enabled: bool = LLM_CACHE_ENABLED,
+        memory_size: int = LLM_CACHE_MEMORY_SIZE
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.enabled = enabled
+        self.memory_size = memory_size
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+    
+    @staticmethod
+    def key(model: str, prompt: str, system: str = "") -> str:
+        """Cache key; includes the model so switching models invalidates entries"""
+        return hashlib.blake2b(f"{model}\0{system}\0{prompt}".encode("utf-8"), digest_size=16).hexdigest()
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            # WAL + NORMAL: a commit no longer waits on an fsync (a lost entry is just a cache miss)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+        return self._conn
+    
+    def get(self, key: str) -> Optional[Dict]:
+        """Cached response, or None if missing, expired or caching is disabled"""
+        if not self.enabled:
+            return None
+        
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[1] > now:
+                self._memory.move_to_end(key)
+                return orjson.loads(entry[0])
+            
+            row = self._connect().execute(
+                "SELECT value, expires FROM responses WHERE key = ? AND expires > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._remember(key, row[0].encode(), row[1])
+        return orjson.loads(row[0])
+    
+    def set(self, key: str, value: Dict):
+        """Store a response for ttl seconds"""
+        if not self.enabled:
+            return
+        
+        data = orjson.dumps(value, option=orjson.OPT_SORT_KEYS)
+        expires = time.time() + self.ttl
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires) VALUES (?, ?, ?)",
+                (key, data.decode(), expires)
+            )
+            conn.commit()
+            self._remember(key, data, expires)
+    
+    async def aget(self, key: str) -> Optional[Dict]:
+        """get() run in a worker thread"""
+        return await asyncio.to_thread(self.get, key)
+    
+    async def aset(self, key: str, value: Dict):
+        """set() run in a worker thread"""
+        await asyncio.to_thread(self.set, key, value)
+    
+    def _remember(self, key: str, data: bytes, expires: float):
+        """Put an entry in the in-memory LRU (lock held)"""
+        self._memory[key] = (data, expires)
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+
+# Shared by all agents
+llm_cache = LLMCache()
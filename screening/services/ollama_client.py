@@ -1,67 +1,193 @@
 # screening/services/ollama_client.py
 
-import aiohttp
-import json
-from typing import Optional, Dict
-from config import OLLAMA_BASE_URL, OLLAMA_MODEL, OLLAMA_TIMEOUT
+import asyncio
+import random
+import re
+import httpx
+import orjson
+from typing import AsyncIterator, Optional, Dict
+from config import (
+    OLLAMA_BASE_URL, OLLAMA_MODEL, OLLAMA_TIMEOUT, OLLAMA_MAX_CONNECTIONS, OLLAMA_HTTP2,
+    OLLAMA_DRAFT_MODEL, OLLAMA_FORMAT, OLLAMA_NUM_PARALLEL, OLLAMA_KEEP_ALIVE
+)
+
+
+_STATUS_RE = re.compile(r"Ollama API error: (\d{3})")
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Timeouts, connection errors and 5xx/429 are worth retrying; other 4xx are not"""
+    while error is not None:
+        if isinstance(error, (asyncio.TimeoutError, httpx.TransportError)):
+            return True
+        match = _STATUS_RE.search(str(error))
+        if match:
+            status = int(match.group(1))
+            return status >= 500 or status == 429
+        error = error.__cause__ or error.__context__
+    return True
 
 
 class OllamaClient:
-    """Async client for Ollama API"""
+    """
+    Async client for Ollama API
     
-    def __init__(self, base_url: str = OLLAMA_BASE_URL, model: str = OLLAMA_MODEL):
+    Holds one httpx client (and its keep-alive connection pool) for all
+    requests; close it with aclose() or use the client as `async with`.
+    With OLLAMA_HTTP2 the requests are multiplexed over one HTTP/2
+    connection instead of one connection each.
+    At most max_parallel generations are in flight; the rest wait here
+    instead of queueing on the Ollama server.
+    """
+    
+    def __init__(
+        self,
+        base_url: str = OLLAMA_BASE_URL,
+        model: str = OLLAMA_MODEL,
+        draft_model: Optional[str] = OLLAMA_DRAFT_MODEL,
+        max_parallel: int = OLLAMA_NUM_PARALLEL
+    ):
         self.base_url = base_url
         self.model = model
+        self.draft_model = draft_model
         self.endpoint = f"{base_url}/api/generate"
+        self._client: Optional[httpx.AsyncClient] = None
+        self._sem = asyncio.Semaphore(max_parallel)
+    
+    async def __aenter__(self) -> "OllamaClient":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """Shared client, created on first use inside the running event loop"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=OLLAMA_TIMEOUT,
+                http2=OLLAMA_HTTP2,
+                # Long generations leave connections idle past httpx's 5 s default
+                limits=httpx.Limits(max_connections=OLLAMA_MAX_CONNECTIONS, keepalive_expiry=60)
+            )
+        return self._client
     
-    async def query(self, prompt: str, temperature: float = 0.7, max_tokens: int = 2000) -> str:
+    async def aclose(self):
+        """Close the pooled connections"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+    
+    def _options(self, temperature: float, max_tokens: int) -> Dict:
+        """Sampling options, plus the speculative-decoding draft model when configured"""
+        options = {
+            "temperature": temperature,
+            "num_predict": max_tokens
+        }
+        if self.draft_model:
+            options["draft_model"] = self.draft_model
+        return options
+    
+    async def query(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        schema: Optional[Dict] = None,
+        system: Optional[str] = None
+    ) -> str:
         """
         Send a query to Ollama and return the response
         
+        Consumes query_stream(), so the reply is read as Ollama generates it
+        instead of as one buffered body.
+        
         Args:
             prompt: The prompt to send
             temperature: Sampling temperature (0.0 - 1.0)
             max_tokens: Maximum tokens to generate
+            schema: JSON schema Ollama constrains decoding to (default: OLLAMA_FORMAT)
+            system: System prompt, sent apart from the per-call prompt
             
         Returns:
             Response text from the model
         """
+        try:
+            parts = [chunk async for chunk in self.query_stream(prompt, temperature, max_tokens, schema, system)]
+        except Exception as e:
+            raise Exception(f"Ollama query failed: {str(e)}")
+        
+        return "".join(parts)
+    
+    async def query_stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 2000,
+        schema: Optional[Dict] = None,
+        system: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream response text from Ollama as it is generated
+        
+        Stopping iteration early closes the connection, which makes Ollama
+        abort the rest of the generation. A system prompt that repeats across
+        calls is templated ahead of the prompt, so while the model stays loaded
+        (keep_alive) Ollama reuses its prefill and only evaluates the prompt.
+        
+        Args:
+            prompt: The prompt to send
+            temperature: Sampling temperature (0.0 - 1.0)
+            max_tokens: Maximum tokens to generate
+            schema: JSON schema Ollama constrains decoding to (default: OLLAMA_FORMAT)
+            system: System prompt, sent apart from the per-call prompt
+            
+        Yields:
+            Chunks of response text
+        """
         payload = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": temperature,
-                "num_predict": max_tokens
-            }
+            "stream": True,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": self._options(temperature, max_tokens)
         }
+        if system:
+            payload["system"] = system
+        # Always constrained to JSON: the given schema, else OLLAMA_FORMAT
+        if schema is not None or OLLAMA_FORMAT:
+            payload["format"] = schema or OLLAMA_FORMAT
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.endpoint,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=OLLAMA_TIMEOUT)
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result.get("response", "")
-                    else:
-                        error_text = await response.text()
-                        raise Exception(f"Ollama API error: {response.status} - {error_text}")
+            client = self._get_client()
+            async with self._sem, client.stream("POST", self.endpoint, json=payload) as response:
+                if response.status_code != 200:
+                    error_text = (await response.aread()).decode("utf-8", "replace")
+                    raise Exception(f"Ollama API error: {response.status_code} - {error_text}")
+                
+                # One JSON object per line: {"response": "...", "done": false}
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    chunk = orjson.loads(line)
+                    if chunk.get("response"):
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
         
-        except aiohttp.ClientError as e:
+        except httpx.TransportError as e:
             raise Exception(f"Failed to connect to Ollama: {str(e)}")
-        except Exception as e:
-            raise Exception(f"Ollama query failed: {str(e)}")
     
-    async def query_with_retry(self, prompt: str, max_retries: int = 3) -> str:
+    async def query_with_retry(self, prompt: str, max_retries: int = 3, backoff_cap: float = 8.0) -> str:
         """
         Query with automatic retry on failure
         
+        Waits 0.5 s, 1 s, 2 s, ... (capped at backoff_cap, plus jitter) between
+        attempts; client errors (4xx other than 429) are raised right away.
+        
         Args:
             prompt: The prompt to send
             max_retries: Maximum number of retry attempts
+            backoff_cap: Longest wait between attempts, in seconds
             
         Returns:
             Response text from the model
@@ -73,11 +199,15 @@ class OllamaClient:
                 return await self.query(prompt)
             except Exception as e:
                 last_error = e
+                if not _is_retryable(e):
+                    break
                 if attempt < max_retries - 1:
-                    print(f"Retry {attempt + 1}/{max_retries} after error: {str(e)}")
+                    delay = min(backoff_cap, 0.5 * 2 ** attempt) + random.uniform(0, 0.25)
+                    print(f"Retry {attempt + 1}/{max_retries} in {delay:.1f}s after error: {str(e)}")
+                    await asyncio.sleep(delay)
                     continue
         
-        raise Exception(f"Failed after {max_retries} attempts: {str(last_error)}")
+        raise Exception(f"Failed after {attempt + 1} attempts: {str(last_error)}")
     
     async def health_check(self) -> bool:
         """
@@ -87,11 +217,7 @@ class OllamaClient:
             True if healthy, False otherwise
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(
-                    f"{self.base_url}/api/tags",
-                    timeout=aiohttp.ClientTimeout(total=5)
-                ) as response:
-                    return response.status == 200
+            response = await self._get_client().get(f"{self.base_url}/api/tags", timeout=5)
+            return response.status_code == 200
         except:
             return False
\ No newline at end of file
@@ -3,16 +3,39 @@
 import streamlit as st
 import asyncio
 import sys
+import threading
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from main import screen_candidates
+from main import screen_candidates, use_uvloop
 from config import RESUME_DIR
 from services.json_loader import get_resume_count
 
 
+@st.cache_resource
+def get_runner():
+    """
+    One event loop (uvloop when installed) for the app's lifetime
+    
+    Reused by every Screen click instead of asyncio.run building a loop
+    each time; the lock keeps concurrent sessions from entering it at once.
+    Returns (run, lock), where run(coro) runs a coroutine to completion.
+    """
+    use_uvloop()
+    # asyncio.Runner is Python 3.11+; older versions reuse a plain loop
+    if hasattr(asyncio, "Runner"):
+        return asyncio.Runner().run, threading.Lock()
+    return asyncio.new_event_loop().run_until_complete, threading.Lock()
+
+
+@st.cache_data(ttl=30)
+def cached_resume_count(directory: str) -> int:
+    """Resume count, rescanned at most every 30 s rather than on every rerun"""
+    return get_resume_count(Path(directory))
+
+
 def main():
     st.set_page_config(
         page_title="Resume Screening System",
@@ -26,7 +49,9 @@ def main():
     # Sidebar info
     with st.sidebar:
         st.header("System Info")
-        resume_count = get_resume_count(RESUME_DIR)
+        if st.button("🔄 Refresh"):
+            cached_resume_count.clear()
+        resume_count = cached_resume_count(str(RESUME_DIR))
         st.metric("Parsed Resumes", resume_count)
         st.info(f"Resume directory: `{RESUME_DIR}`")
         
@@ -78,7 +103,9 @@ The ideal candidate should have strong problem-solving skills and team collabora
             # Run screening
             with st.spinner("🔍 Analyzing candidates... This may take a moment."):
                 try:
-                    results, screening_time = asyncio.run(screen_candidates(jd_text))
+                    run, lock = get_runner()
+                    with lock:
+                        results, screening_time = run(screen_candidates(jd_text))
                     
                     # Display results
                     st.markdown("---")
@@ -1,45 +1,110 @@
 # screening/utils/factual_extraction.py
 
-from typing import Dict, List, Tuple, Set
+import re
+from typing import Dict, List, Optional, Tuple, Set
 from datetime import datetime
+from itertools import chain
 from dateutil import parser as date_parser
 
 
-def extract_skills(candidate: Dict) -> List[str]:
-    """Extract all skills from candidate resume"""
-    skills = []
+_MONTH_NAMES = (
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december"
+)
+_MONTHS = {name[:3]: (month, name) for month, name in enumerate(_MONTH_NAMES, 1)}
+
+# The shapes resume dates almost always take; anything else goes to dateutil
+_RE_MON_YEAR = re.compile(r"^\s*([A-Za-z]{3,9})\.?[\s,'-]*(\d{4})\s*$")   # Jan 2021, September 2021
+_RE_ISO = re.compile(r"^\s*(\d{4})[-/.](\d{1,2})(?:[-/.]\d{1,2})?\s*$")   # 2021-03, 2021/03/15
+_RE_MONTH_YEAR = re.compile(r"^\s*(\d{1,2})[-/.](\d{4})\s*$")             # 03/2021
+_RE_YEAR = re.compile(r"^\s*(\d{4})\s*$")                                  # 2021
+
+
+
+def _keyword_re(keywords: Tuple[str, ...]) -> "re.Pattern":
+    """Case-insensitive substring match of any keyword, as one C-level search"""
+    return re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
+
+
+# Education relevance tiers for technical roles, then degree levels
+_EDU_HIGH = _keyword_re(("computer science", "software engineering", "information technology", "cs", "computer engineering"))
+_EDU_MEDIUM = _keyword_re(("engineering", "electronics", "telecommunication", "mathematics", "physics", "data science"))
+_EDU_BASIC = _keyword_re(("bachelor", "b.tech", "b.e", "master", "m.tech"))
+_EDU_DEGREE = _keyword_re(("bachelor", "master", "phd"))
+
+# Position keywords marking a relevant (technical) role
+_ROLE_RE = _keyword_re(("software", "developer", "engineer", "programmer", "technical", "backend", "frontend", "fullstack", "devops", "data"))
+
+
+def parse_year_month(date_str: str, now: Optional[datetime] = None) -> Tuple[int, int]:
+    """
+    (year, month) of a resume date string
     
-    # Technical skills
-    tech_skills = candidate.get("skills", {}).get("technical", [])
-    skills.extend(tech_skills)
+    Common shapes are matched with precompiled regexes; others fall back to
+    dateutil's fuzzy parser (which raises if it finds no date). A bare year
+    takes the current month (of `now`, if given), as dateutil does.
+    """
+    match = _RE_MON_YEAR.match(date_str)
+    if match:
+        entry = _MONTHS.get(match.group(1)[:3].lower())
+        if entry and entry[1].startswith(match.group(1).lower()):
+            return int(match.group(2)), entry[0]
     
-    # Tools
-    tools = candidate.get("skills", {}).get("tools", [])
-    skills.extend(tools)
+    match = _RE_ISO.match(date_str)
+    if match and 1 <= int(match.group(2)) <= 12:
+        return int(match.group(1)), int(match.group(2))
     
-    # Technologies from projects
-    projects = candidate.get("projects", [])
-    for proj in projects:
-        technologies = proj.get("technologies", [])
-        skills.extend(technologies)
+    match = _RE_MONTH_YEAR.match(date_str)
+    if match and 1 <= int(match.group(1)) <= 12:
+        return int(match.group(2)), int(match.group(1))
+    
+    match = _RE_YEAR.match(date_str)
+    if match:
+        return int(match.group(1)), (now or datetime.now()).month
+    
+    parsed = date_parser.parse(date_str, fuzzy=True)
+    return parsed.year, parsed.month
+
+
+def extract_skills(candidate: Dict) -> List[str]:
+    """Extract all skills from candidate resume"""
+    skills = candidate.get("skills", {})
+    
+    # Technical skills, tools and technologies from projects
+    sources = chain(
+        skills.get("technical", []),
+        skills.get("tools", []),
+        *(proj.get("technologies", []) for proj in candidate.get("projects", []))
+    )
     
     # Remove duplicates, normalize
-    unique_skills = list(set(s.strip() for s in skills if s))
-    return unique_skills
+    return list({s.strip() for s in sources if s})
+
 
+def lower_skills(skills: List[str]) -> List[Tuple[str, str]]:
+    """(original, normalized) pairs; done once per JD for its required skills"""
+    return [(s, s.lower().strip()) for s in skills]
 
-def match_skills(candidate_skills: List[str], required_skills: List[str]) -> Tuple[List[str], List[str]]:
+
+def match_skills(
+    candidate_skills: List[str],
+    required_skills: List[str],
+    required_lower: Optional[List[Tuple[str, str]]] = None
+) -> Tuple[List[str], List[str]]:
     """
     Match candidate skills against required skills
+    Pass lower_skills(required_skills) as required_lower to reuse it across candidates
     Returns: (matched_skills, missing_skills)
     """
-    candidate_lower = [s.lower().strip() for s in candidate_skills]
+    if required_lower is None:
+        required_lower = lower_skills(required_skills)
+    
+    candidate_lower = {s.lower().strip() for s in candidate_skills}
     
     matched = []
     missing = []
     
-    for req_skill in required_skills:
-        req_lower = req_skill.lower().strip()
+    for req_skill, req_lower in required_lower:
         if req_lower in candidate_lower:
             matched.append(req_skill)
         else:
@@ -56,6 +121,7 @@ def calculate_experience_years(candidate: Dict) -> float:
         return 0.0
     
     total_months = 0
+    now = datetime.now()
     
     for exp in experience:
         start_str = exp.get("start_date", "")
@@ -66,16 +132,16 @@ def calculate_experience_years(candidate: Dict) -> float:
             if "–" in start_str or "—" in start_str:
                 start_str = start_str.replace("–", " ").replace("—", " ").split()[0]
             
-            start_date = date_parser.parse(start_str, fuzzy=True)
+            start_year, start_month = parse_year_month(start_str, now)
             
             if end_str.lower() in ["present", "current", "now"]:
-                end_date = datetime.now()
+                end_year, end_month = now.year, now.month
             else:
                 if "–" in end_str or "—" in end_str:
                     end_str = end_str.replace("–", " ").replace("—", " ").split()[-1]
-                end_date = date_parser.parse(end_str, fuzzy=True)
+                end_year, end_month = parse_year_month(end_str, now)
             
-            months = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
+            months = (end_year - start_year) * 12 + (end_month - start_month)
             total_months += max(0, months)
         except Exception as e:
             # If parse fails, assume 1 year per role
@@ -95,24 +161,21 @@ def check_education_relevance(candidate: Dict, domain: str = "technical") -> Dic
         return {"score": 0, "relevant": False, "degrees": []}
     
     degrees = [edu.get("degree", "") for edu in education]
-    degrees_text = " ".join(degrees).lower()
+    degrees_text = " ".join(degrees)
     
-    # Define relevance keywords by domain
+    # Relevance keywords by domain
     if domain.lower() == "technical":
-        high_relevance = ["computer science", "software engineering", "information technology", "cs", "computer engineering"]
-        medium_relevance = ["engineering", "electronics", "telecommunication", "mathematics", "physics", "data science"]
-        
-        if any(kw in degrees_text for kw in high_relevance):
+        if _EDU_HIGH.search(degrees_text):
             return {"score": 100, "relevant": True, "degrees": degrees}
-        elif any(kw in degrees_text for kw in medium_relevance):
+        elif _EDU_MEDIUM.search(degrees_text):
             return {"score": 70, "relevant": True, "degrees": degrees}
-        elif any(kw in degrees_text for kw in ["bachelor", "b.tech", "b.e", "master", "m.tech"]):
+        elif _EDU_BASIC.search(degrees_text):
             return {"score": 30, "relevant": False, "degrees": degrees}
         else:
             return {"score": 10, "relevant": False, "degrees": degrees}
     
     # For non-technical roles, just check if degree exists
-    if any(kw in degrees_text for kw in ["bachelor", "master", "phd"]):
+    if _EDU_DEGREE.search(degrees_text):
         return {"score": 70, "relevant": True, "degrees": degrees}
     
     return {"score": 30, "relevant": False, "degrees": degrees}
@@ -132,9 +195,6 @@ def check_role_relevance(candidate: Dict, jd_requirements: Dict) -> Dict:
     role_level = jd_requirements.get("role_level", "").lower()
     domain = jd_requirements.get("domain", "").lower()
     
-    # Define relevant keywords based on JD (default to technical)
-    relevant_keywords = ["software", "developer", "engineer", "programmer", "technical", "backend", "frontend", "fullstack", "devops", "data"]
-    
     all_roles = []
     relevant_roles = []
     
@@ -144,8 +204,7 @@ def check_role_relevance(candidate: Dict, jd_requirements: Dict) -> Dict:
         all_roles.append(position)
         
         # Check if position contains relevant keywords
-        position_lower = position.lower()
-        if any(kw in position_lower for kw in relevant_keywords):
+        if _ROLE_RE.search(position):
             relevant_roles.append(position)
     
     return {
@@ -155,7 +214,27 @@ def check_role_relevance(candidate: Dict, jd_requirements: Dict) -> Dict:
     }
 
 
-def get_factual_baseline(candidate: Dict, jd_requirements: Dict) -> Dict:
+def get_factual_baselines(
+    candidates: List[Dict],
+    jd_requirements: Dict,
+    required_lower: Optional[List[Tuple[str, str]]] = None
+) -> List[Dict]:
+    """
+    get_factual_baseline for every candidate of a run, in one pass
+    
+    The per-JD work (normalized required skills) is shared by all candidates.
+    """
+    if required_lower is None:
+        required_lower = lower_skills(jd_requirements.get("required_skills", []))
+    
+    return [get_factual_baseline(candidate, jd_requirements, required_lower) for candidate in candidates]
+
+
+def get_factual_baseline(
+    candidate: Dict,
+    jd_requirements: Dict,
+    required_lower: Optional[List[Tuple[str, str]]] = None
+) -> Dict:
     """
     Extract all factual information before LLM evaluation
     This prevents LLM from making up facts
@@ -164,7 +243,7 @@ def get_factual_baseline(candidate: Dict, jd_requirements: Dict) -> Dict:
     # Skills analysis
     candidate_skills = extract_skills(candidate)
     required_skills = jd_requirements.get("required_skills", [])
-    matched_skills, missing_skills = match_skills(candidate_skills, required_skills)
+    matched_skills, missing_skills = match_skills(candidate_skills, required_skills, required_lower)
     
     # Calculate skill match percentage
     if required_skills:
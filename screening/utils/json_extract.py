@@ -0,0 +1,47 @@
+# screening/utils/json_extract.py
+
+import re
+import orjson
+from typing import Dict, Optional
+
+
+# A (possibly unterminated, when the stream was cut) markdown code fence around
+# a JSON object; greedy so nested objects are kept whole
+_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*\})", re.DOTALL)
+
+
+def extract_json(text: str) -> Optional[Dict]:
+    """
+    Parse a JSON object from an LLM reply
+    
+    Tries the reply as-is, then the contents of a markdown code fence, then
+    the span from the first "{" to the last "}". Returns None if nothing parses.
+    """
+    # Schema/format-constrained replies are plain JSON: parse them without
+    # scanning the text for fences or braces
+    try:
+        result = orjson.loads(text)
+    except orjson.JSONDecodeError:
+        result = None
+    if isinstance(result, dict):
+        return result
+    
+    candidates = []
+    
+    match = _FENCE_RE.search(text)
+    if match:
+        candidates.append(match.group(1))
+    
+    start, end = text.find("{"), text.rfind("}")
+    if 0 <= start < end:
+        candidates.append(text[start:end + 1])
+    
+    for candidate in candidates:
+        try:
+            result = orjson.loads(candidate)
+        except orjson.JSONDecodeError:
+            continue
+        if isinstance(result, dict):
+            return result
+    
+    return None
@@ -1,9 +1,61 @@
 # screening/utils/scoring.py
 
-from typing import Dict
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, NamedTuple, Tuple, Union
 
 
-def combine_scores(technical: Dict, career: Dict, fit: Dict, weights: Dict) -> Dict:
+# Lower bound of each tier above "Poor"; a score on a bound gets the higher tier
+_TIER_THRESHOLDS = [45, 60, 75, 90]
+_TIER_LABELS = ["Poor", "Below Average", "Adequate", "Strong", "Exceptional"]
+
+# Breakdown agent -> prefix of its keys in aggregate_category_scores()
+_CATEGORY_PREFIXES = (("technical", "tech_"), ("career", "career_"), ("fit", "fit_"))
+
+# (technical, career, fit) weights, as returned by prepare_weights()
+Weights = Tuple[float, float, float]
+
+
+class WeightedScores(NamedTuple):
+    """Each agent's score times its weight"""
+    technical: float
+    career: float
+    fit: float
+
+
+class ScoreResult(NamedTuple):
+    """combine_scores() result; as_dict() gives the nested dict form for JSON output"""
+    total: float
+    breakdown: Dict
+    weighted_scores: WeightedScores
+    
+    def as_dict(self) -> Dict:
+        return {
+            "total": self.total,
+            "breakdown": self.breakdown,
+            "weighted_scores": self.weighted_scores._asdict()
+        }
+
+
+def prepare_weights(weights: Union[Dict, Weights]) -> Weights:
+    """
+    Unpack a config weight dict once, so per-candidate scoring skips the dict lookups
+    
+    The weights are scaled to sum to 1, so totals stay on the 0-100 scale
+    whatever the config adds up to; a tuple is taken as already prepared.
+    """
+    if not isinstance(weights, dict):
+        return weights
+    
+    w_tech, w_career, w_fit = weights["technical"], weights["career"], weights["fit"]
+    weight_sum = w_tech + w_career + w_fit
+    if weight_sum <= 0:
+        raise ValueError(f"Score weights must have a positive sum, got {weights}")
+    
+    scale = 1.0 / weight_sum
+    return w_tech * scale, w_career * scale, w_fit * scale
+
+
+def combine_scores(technical: Dict, career: Dict, fit: Dict, weights: Union[Dict, Weights]) -> ScoreResult:
     """
     Combine agent scores into final weighted score
     
@@ -11,49 +63,70 @@ def combine_scores(technical: Dict, career: Dict, fit: Dict, weights: Dict) -> D
         technical: Score dict from SkillAgent
         career: Score dict from ExperienceAgent
         fit: Score dict from FitAgent
-        weights: Weight dictionary from config
+        weights: Weight dictionary from config, or prepare_weights() of it
         
     Returns:
-        {
-            "total": float (0-100),
-            "breakdown": {
+        ScoreResult(
+            total=float (0-100),
+            breakdown={
                 "technical": {...},
                 "career": {...},
                 "fit": {...}
             },
-            "weighted_scores": {
-                "technical": float,
-                "career": float,
-                "fit": float
-            }
-        }
+            weighted_scores=WeightedScores(technical, career, fit)
+        )
+    """
+    return _combine(technical, career, fit, *prepare_weights(weights))
+
+
+def combine_scores_batch(
+    technical: List[Dict],
+    career: List[Dict],
+    fit: List[Dict],
+    weights: Union[Dict, Weights]
+) -> List[ScoreResult]:
     """
+    Combine agent scores for many candidates at once
+    
+    Same result as combine_scores() per candidate (the lists are parallel,
+    one entry per candidate); the weights are looked up once for the batch.
+    """
+    w_tech, w_career, w_fit = prepare_weights(weights)
+    
+    return [
+        _combine(tech, car, candidate_fit, w_tech, w_career, w_fit)
+        for tech, car, candidate_fit in zip(technical, career, fit)
+    ]
+
+
+def _combine(technical: Dict, career: Dict, fit: Dict, w_tech: float, w_career: float, w_fit: float) -> ScoreResult:
+    """combine_scores() with the weights already unpacked"""
     # Extract scores
     tech_score = technical.get("score", 0)
     career_score = career.get("score", 0)
     fit_score = fit.get("score", 0)
     
     # Apply weights
-    weighted_tech = tech_score * weights["technical"]
-    weighted_career = career_score * weights["career"]
-    weighted_fit = fit_score * weights["fit"]
+    weighted_tech = tech_score * w_tech
+    weighted_career = career_score * w_career
+    weighted_fit = fit_score * w_fit
     
     # Calculate total
     total_score = weighted_tech + weighted_career + weighted_fit
     
-    return {
-        "total": round(total_score, 2),
-        "breakdown": {
+    return ScoreResult(
+        total=round(total_score, 2),
+        breakdown={
             "technical": technical,
             "career": career,
             "fit": fit
         },
-        "weighted_scores": {
-            "technical": round(weighted_tech, 2),
-            "career": round(weighted_career, 2),
-            "fit": round(weighted_fit, 2)
-        }
-    }
+        weighted_scores=WeightedScores(
+            technical=round(weighted_tech, 2),
+            career=round(weighted_career, 2),
+            fit=round(weighted_fit, 2)
+        )
+    )
 
 
 def normalize_score(score: float, min_val: float = 0, max_val: float = 100) -> float:
@@ -91,6 +164,29 @@ def calculate_percentile_rank(scores: list, target_score: float) -> float:
     return round(percentile, 1)
 
 
+def calculate_percentile_ranks(scores: list, targets: list) -> List[float]:
+    """
+    calculate_percentile_rank() for many targets
+    
+    Sorts the scores once and bisects per target, rather than rescanning
+    every score for every target.
+    
+    Args:
+        scores: List of all scores
+        targets: Scores to rank
+        
+    Returns:
+        Percentile (0-100) per target, in order
+    """
+    if not scores:
+        return [50.0] * len(targets)
+    
+    ordered = sorted(scores)
+    total = len(ordered)
+    
+    return [round((bisect_left(ordered, target) / total) * 100, 1) for target in targets]
+
+
 def get_score_tier(score: float) -> str:
     """
     Get qualitative tier for a score
@@ -101,16 +197,12 @@ def get_score_tier(score: float) -> str:
     Returns:
         Tier label
     """
-    if score >= 90:
-        return "Exceptional"
-    elif score >= 75:
-        return "Strong"
-    elif score >= 60:
-        return "Adequate"
-    elif score >= 45:
-        return "Below Average"
-    else:
-        return "Poor"
+    return _TIER_LABELS[bisect_right(_TIER_THRESHOLDS, score)]
+
+
+def get_score_tiers(scores: list) -> List[str]:
+    """get_score_tier() for every score, in order"""
+    return [_TIER_LABELS[bisect_right(_TIER_THRESHOLDS, score)] for score in scores]
 
 
 def calculate_confidence_score(agent_scores: Dict) -> float:
@@ -129,10 +221,9 @@ def calculate_confidence_score(agent_scores: Dict) -> float:
         agent_scores.get("fit", {}).get("score", 50)
     ]
     
-    # Calculate variance
-    mean_score = sum(scores) / len(scores)
-    variance = sum((s - mean_score) ** 2 for s in scores) / len(scores)
-    std_dev = variance ** 0.5
+    # Calculate variance in one pass (Welford)
+    n, _, m2 = _welford(scores)
+    std_dev = (m2 / n) ** 0.5
     
     # Lower variance = higher confidence
     # Max std_dev of 50 (scores 0, 50, 100) = 0% confidence
@@ -142,34 +233,82 @@ def calculate_confidence_score(agent_scores: Dict) -> float:
     return round(confidence, 2)
 
 
-def aggregate_category_scores(breakdown: Dict) -> Dict:
+def calculate_cohort_variance(score_matrix: List[list]) -> Tuple[float, float]:
     """
-    Aggregate all category scores from agent breakdowns
+    Mean and (population) variance of every score across a cohort
+    
+    Each row (e.g. one candidate's agent scores) is reduced on its own and
+    the row aggregates are merged pairwise as a balanced tree, which keeps
+    rounding error growing with log(rows) rather than with the row count.
     
     Args:
-        breakdown: Breakdown dict with all agent results
+        score_matrix: One list of scores per candidate
         
     Returns:
-        Dictionary of all category scores
+        (mean, variance); (0.0, 0.0) if there are no scores
     """
-    categories = {}
+    parts = [_welford(row) for row in score_matrix]
+    if not parts:
+        return 0.0, 0.0
     
-    # Extract from technical agent
-    tech_categories = breakdown.get("technical", {}).get("category_scores", {})
-    for key, value in tech_categories.items():
-        categories[f"tech_{key}"] = value
+    while len(parts) > 1:
+        merged = [_welford_merge(parts[i], parts[i + 1]) for i in range(0, len(parts) - 1, 2)]
+        if len(parts) % 2:
+            merged.append(parts[-1])
+        parts = merged
     
-    # Extract from career agent
-    career_categories = breakdown.get("career", {}).get("category_scores", {})
-    for key, value in career_categories.items():
-        categories[f"career_{key}"] = value
+    n, mean, m2 = parts[0]
+    if n == 0:
+        return 0.0, 0.0
+    return mean, m2 / n
+
+
+def _welford(scores: list) -> Tuple[int, float, float]:
+    """(count, mean, M2) of scores in one pass"""
+    n, mean, m2 = 0, 0.0, 0.0
+    for s in scores:
+        n += 1
+        delta = s - mean
+        mean += delta / n
+        m2 += delta * (s - mean)
+    return n, mean, m2
+
+
+def _welford_merge(a: Tuple[int, float, float], b: Tuple[int, float, float]) -> Tuple[int, float, float]:
+    """
+    Merge two (count, mean, M2) running-variance aggregates (Chan et al.)
     
-    # Extract from fit agent
-    fit_categories = breakdown.get("fit", {}).get("category_scores", {})
-    for key, value in fit_categories.items():
-        categories[f"fit_{key}"] = value
+    Lets partial aggregates, e.g. per batch of candidates, be combined
+    without revisiting the scores; variance is M2 / count.
+    """
+    n_a, mean_a, m2_a = a
+    n_b, mean_b, m2_b = b
+    n = n_a + n_b
+    if n == 0:
+        return 0, 0.0, 0.0
     
-    return categories
+    delta = mean_b - mean_a
+    mean = mean_a + delta * n_b / n
+    m2 = m2_a + m2_b + delta * delta * n_a * n_b / n
+    return n, mean, m2
+
+
+def aggregate_category_scores(breakdown: Dict) -> Dict:
+    """
+    Aggregate all category scores from agent breakdowns
+    
+    Args:
+        breakdown: Breakdown dict with all agent results
+        
+    Returns:
+        Dictionary of all category scores
+    """
+    # One pass over every agent's categories, keys prefixed by agent
+    return {
+        prefix + key: value
+        for agent, prefix in _CATEGORY_PREFIXES
+        for key, value in breakdown.get(agent, {}).get("category_scores", {}).items()
+    }
 
 
 def compare_candidates(candidate1: Dict, candidate2: Dict) -> Dict:
@@ -202,4 +341,41 @@ def compare_candidates(candidate1: Dict, candidate2: Dict) -> Dict:
         )
     }
     
-    return comparison
\ No newline at end of file
+    return comparison
+
+def pairwise_compare(candidates: List[Dict]) -> Tuple[List[List[Tuple[float, float, float, float]]], List[List[str]]]:
+    """
+    compare_candidates() for every pair in a cohort
+    
+    Each candidate's (total, technical, career, fit) scores are read once,
+    instead of once per pair they appear in.
+    
+    Args:
+        candidates: Candidate result dicts
+        
+    Returns:
+        (deltas, winners): deltas[i][j] is candidate i's scores minus
+        candidate j's, as (total, technical, career, fit); winners[i][j] is
+        the name compare_candidates(candidates[i], candidates[j]) picks
+    """
+    vectors = [
+        (
+            candidate["total_score"],
+            candidate["breakdown"]["technical"]["score"],
+            candidate["breakdown"]["career"]["score"],
+            candidate["breakdown"]["fit"]["score"]
+        )
+        for candidate in candidates
+    ]
+    names = [candidate["name"] for candidate in candidates]
+    
+    deltas = [
+        [(t1 - t2, tech1 - tech2, car1 - car2, fit1 - fit2) for t2, tech2, car2, fit2 in vectors]
+        for t1, tech1, car1, fit1 in vectors
+    ]
+    winners = [
+        [name_i if row[j][0] > 0 else names[j] for j in range(len(names))]
+        for name_i, row in zip(names, deltas)
+    ]
+    
+    return deltas, winners
@@ -1,6 +1,23 @@
 # screening/utils/validators.py
 
-from typing import Dict, List, Tuple, Optional
+import re
+from typing import Dict, Iterator, List, Tuple, Optional, Union
+
+from utils.scoring import Weights, prepare_weights
+
+
+# Body of the first ```json block, else of the first ``` block (to the end if unclosed)
+_JSON_FENCE_RE = re.compile(r"```json(.*?)(?:```|\Z)", re.DOTALL)
+_FENCE_RE = re.compile(r"```(.*?)(?:```|\Z)", re.DOTALL)
+# Chatty lead-ins dropped up to their first colon; checked in this order, each
+# once, so stacked ones ("Here is: Result: {...}") are all removed
+_LEAD_INS = ("Here is", "Here's", "The JSON", "Output:", "Result:")
+
+# Fields every agent output needs; the tuple keeps error messages in order
+_AGENT_REQUIRED_FIELDS = ("score", "reasoning", "strengths", "weaknesses")
+_AGENT_REQUIRED_SET = frozenset(_AGENT_REQUIRED_FIELDS)
+
+_VALID_ROLE_LEVELS = frozenset({"entry", "mid", "senior", "lead", "principal", "staff"})
 
 
 def validate_agent_output(output: Dict, agent_name: str) -> Tuple[bool, List[str]]:
@@ -14,37 +31,57 @@ def validate_agent_output(output: Dict, agent_name: str) -> Tuple[bool, List[str
     Returns:
         (is_valid, list_of_errors)
     """
-    errors = []
-    
-    # Check required fields
-    required_fields = ["score", "reasoning", "strengths", "weaknesses"]
-    for field in required_fields:
-        if field not in output:
-            errors.append(f"{agent_name}: Missing required field '{field}'")
+    errors = list(_iter_agent_output_errors(output, agent_name))
+    return not errors, errors
+
+
+def is_valid_agent_output(output: Dict) -> bool:
+    """validate_agent_output() without the messages; stops at the first problem"""
+    return next(_iter_agent_output_errors(output, "agent"), None) is None
+
+
+def _iter_agent_output_errors(output: Dict, agent_name: str) -> Iterator[str]:
+    """validate_agent_output() errors, generated as they are found"""
+    # Check required fields; one set comparison when nothing is missing
+    if not _AGENT_REQUIRED_SET <= output.keys():
+        for field in _AGENT_REQUIRED_FIELDS:
+            if field not in output:
+                yield f"{agent_name}: Missing required field '{field}'"
     
     # Validate score
     if "score" in output:
         score = output["score"]
         if not isinstance(score, (int, float)):
-            errors.append(f"{agent_name}: Score must be numeric, got {type(score)}")
+            yield f"{agent_name}: Score must be numeric, got {type(score)}"
         elif score < 0 or score > 100:
-            errors.append(f"{agent_name}: Score {score} out of valid range (0-100)")
+            yield f"{agent_name}: Score {score} out of valid range (0-100)"
     
     # Validate reasoning
     if "reasoning" in output:
         if not isinstance(output["reasoning"], str):
-            errors.append(f"{agent_name}: Reasoning must be string")
+            yield f"{agent_name}: Reasoning must be string"
         elif len(output["reasoning"]) < 10:
-            errors.append(f"{agent_name}: Reasoning too short")
+            yield f"{agent_name}: Reasoning too short"
     
     # Validate strengths/weaknesses
     for field in ["strengths", "weaknesses"]:
         if field in output:
             if not isinstance(output[field], list):
-                errors.append(f"{agent_name}: {field} must be a list")
+                yield f"{agent_name}: {field} must be a list"
+
+
+def validate_agent_outputs(outputs: List[Dict], agent_name: str) -> List[Tuple[bool, List[str]]]:
+    """
+    validate_agent_output() for every output of one agent, in order
     
-    is_valid = len(errors) == 0
-    return is_valid, errors
+    Args:
+        outputs: Agent output dictionaries, e.g. one per candidate
+        agent_name: Name of the agent for error messages
+        
+    Returns:
+        (is_valid, list_of_errors) per output
+    """
+    return [validate_agent_output(output, agent_name) for output in outputs]
 
 
 def validate_jd_requirements(jd_req: Dict) -> Tuple[bool, List[str]]:
@@ -57,8 +94,12 @@ def validate_jd_requirements(jd_req: Dict) -> Tuple[bool, List[str]]:
     Returns:
         (is_valid, list_of_errors)
     """
-    errors = []
-    
+    errors = list(_iter_jd_errors(jd_req))
+    return not errors, errors
+
+
+def _iter_jd_errors(jd_req: Dict) -> Iterator[str]:
+    """validate_jd_requirements() errors, generated as they are found"""
     # Check required fields
     required_fields = [
         "required_skills",
@@ -69,29 +110,27 @@ def validate_jd_requirements(jd_req: Dict) -> Tuple[bool, List[str]]:
     
     for field in required_fields:
         if field not in jd_req:
-            errors.append(f"JD Parser: Missing field '{field}'")
+            yield f"JD Parser: Missing field '{field}'"
     
     # Validate data types
     if "required_skills" in jd_req and not isinstance(jd_req["required_skills"], list):
-        errors.append("JD Parser: required_skills must be a list")
+        yield "JD Parser: required_skills must be a list"
     
     if "preferred_skills" in jd_req and not isinstance(jd_req["preferred_skills"], list):
-        errors.append("JD Parser: preferred_skills must be a list")
+        yield "JD Parser: preferred_skills must be a list"
     
     if "min_experience_years" in jd_req:
         exp = jd_req["min_experience_years"]
         if not isinstance(exp, (int, float)) or exp < 0:
-            errors.append(f"JD Parser: Invalid min_experience_years value: {exp}")
+            yield f"JD Parser: Invalid min_experience_years value: {exp}"
     
     # Validate role level
-    valid_levels = ["entry", "mid", "senior", "lead", "principal", "staff"]
     if "role_level" in jd_req:
-        level = jd_req["role_level"].lower()
-        if level not in valid_levels:
-            errors.append(f"JD Parser: Invalid role_level '{level}'")
-    
-    is_valid = len(errors) == 0
-    return is_valid, errors
+        level = jd_req["role_level"]
+        if not level.islower():
+            level = level.lower()
+        if level not in _VALID_ROLE_LEVELS:
+            yield f"JD Parser: Invalid role_level '{level}'"
 
 
 def validate_resume_json(resume: Dict) -> Tuple[bool, List[str]]:
@@ -104,30 +143,36 @@ def validate_resume_json(resume: Dict) -> Tuple[bool, List[str]]:
     Returns:
         (is_valid, list_of_errors)
     """
-    errors = []
-    
+    errors = list(_iter_resume_errors(resume))
+    return not errors, errors
+
+
+def is_valid_resume_json(resume: Dict) -> bool:
+    """validate_resume_json() without the messages; stops at the first problem"""
+    return next(_iter_resume_errors(resume), None) is None
+
+
+def _iter_resume_errors(resume: Dict) -> Iterator[str]:
+    """validate_resume_json() errors, generated as they are found"""
     # Check top-level fields
     if "personal_info" not in resume:
-        errors.append("Resume: Missing 'personal_info' section")
+        yield "Resume: Missing 'personal_info' section"
     else:
         personal = resume["personal_info"]
         if "name" not in personal or not personal["name"]:
-            errors.append("Resume: Missing candidate name")
+            yield "Resume: Missing candidate name"
         if "email" not in personal or not personal["email"]:
-            errors.append("Resume: Missing candidate email")
+            yield "Resume: Missing candidate email"
     
     # Check optional but important fields
     if "experience" in resume and not isinstance(resume["experience"], list):
-        errors.append("Resume: 'experience' must be a list")
+        yield "Resume: 'experience' must be a list"
     
     if "skills" in resume and not isinstance(resume["skills"], dict):
-        errors.append("Resume: 'skills' must be a dictionary")
+        yield "Resume: 'skills' must be a dictionary"
     
     if "education" in resume and not isinstance(resume["education"], list):
-        errors.append("Resume: 'education' must be a list")
-    
-    is_valid = len(errors) == 0
-    return is_valid, errors
+        yield "Resume: 'education' must be a list"
 
 
 def validate_final_results(results: List[Dict]) -> Tuple[bool, List[str]]:
@@ -140,34 +185,35 @@ def validate_final_results(results: List[Dict]) -> Tuple[bool, List[str]]:
     Returns:
         (is_valid, list_of_errors)
     """
-    errors = []
-    
+    errors = list(_iter_result_errors(results))
+    return not errors, errors
+
+
+def _iter_result_errors(results: List[Dict]) -> Iterator[str]:
+    """validate_final_results() errors, generated as they are found"""
     if not results:
-        errors.append("Results: Empty results list")
-        return False, errors
+        yield "Results: Empty results list"
+        return
     
     required_fields = ["candidate_id", "name", "total_score", "breakdown"]
     
     for idx, result in enumerate(results):
         for field in required_fields:
             if field not in result:
-                errors.append(f"Result {idx}: Missing field '{field}'")
+                yield f"Result {idx}: Missing field '{field}'"
         
         # Validate score
         if "total_score" in result:
             score = result["total_score"]
             if not isinstance(score, (int, float)):
-                errors.append(f"Result {idx}: Score must be numeric")
+                yield f"Result {idx}: Score must be numeric"
             elif score < 0 or score > 100:
-                errors.append(f"Result {idx}: Score {score} out of range")
+                yield f"Result {idx}: Score {score} out of range"
     
-    # Check if properly ranked
+    # Check if properly ranked; one pass over neighbours instead of sorting a copy
     scores = [r.get("total_score", 0) for r in results]
-    if scores != sorted(scores, reverse=True):
-        errors.append("Results: Not properly sorted by score")
-    
-    is_valid = len(errors) == 0
-    return is_valid, errors
+    if any(earlier < later for earlier, later in zip(scores, scores[1:])):
+        yield "Results: Not properly sorted by score"
 
 
 def sanitize_llm_output(text: str) -> str:
@@ -181,28 +227,26 @@ def sanitize_llm_output(text: str) -> str:
         Cleaned text
     """
     # Remove markdown code blocks
-    if "```json" in text:
-        text = text.split("```json")[1].split("```")[0]
-    elif "```" in text:
-        text = text.split("```")[1].split("```")[0]
+    match = _JSON_FENCE_RE.search(text) or _FENCE_RE.search(text)
+    if match:
+        text = match.group(1)
     
     # Remove common prefixes
-    prefixes = ["Here is", "Here's", "The JSON", "Output:", "Result:"]
-    for prefix in prefixes:
-        if text.strip().startswith(prefix):
+    for prefix in _LEAD_INS:
+        if text.lstrip().startswith(prefix):
             text = text.split(":", 1)[-1]
     
     return text.strip()
 
 
-def check_score_consistency(breakdown: Dict, total: float, weights: Dict) -> bool:
+def check_score_consistency(breakdown: Dict, total: float, weights: Union[Dict, Weights]) -> bool:
     """
     Verify that total score matches weighted breakdown
     
     Args:
         breakdown: Agent breakdown dictionary
         total: Reported total score
-        weights: Weight configuration
+        weights: Weight configuration, or prepare_weights() of it
         
     Returns:
         True if consistent, False otherwise
@@ -211,11 +255,8 @@ def check_score_consistency(breakdown: Dict, total: float, weights: Dict) -> boo
     career_score = breakdown.get("career", {}).get("score", 0)
     fit_score = breakdown.get("fit", {}).get("score", 0)
     
-    calculated_total = (
-        tech_score * weights["technical"] +
-        career_score * weights["career"] +
-        fit_score * weights["fit"]
-    )
+    w_tech, w_career, w_fit = prepare_weights(weights)
+    calculated_total = tech_score * w_tech + career_score * w_career + fit_score * w_fit
     
     # Allow small floating point difference
     return abs(calculated_total - total) < 0.1
\ No newline at end of file